@@ -0,0 +1,10 @@
+; origin: def f [slice 1/1] [qf]
+; result: unsat
+; time: 0.000190s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun n () Int)
+(assert
+ (let (($x22 (and (=> and (and (= (+ n 2) (+ (+ 1 n) 1)))))))
+(not $x22)))
+(check-sat)
@@ -0,0 +1,11 @@
+; origin: def k [slice 1/1] [qf]
+; result: unsat
+; time: 0.000409s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun a () Int)
+(assert
+ (let (($x41 (=> (and (>= a 0) (< a 1)) (and (= (+ a 3) 3)))))
+(let (($x57 (and $x41)))
+(not $x57))))
+(check-sat)
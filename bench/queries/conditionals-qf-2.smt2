@@ -0,0 +1,11 @@
+; origin: def f [slice 1/1] [qf]
+; result: sat
+; time: 0.000109s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun n () Int)
+(assert
+ (let (($x25 (and (= (+ n 2) (+ (+ 1 n) 1)) (= (+ (+ 1 n) 1) (+ (+ 1 n) 2)))))
+(let (($x28 (and (=> and $x25))))
+(not $x28))))
+(check-sat)
@@ -0,0 +1,15 @@
+; origin: def f [qf]
+; result: unsat
+; time: 0.000070s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun n () Int)
+(declare-fun p () Bool)
+(assert
+ (let ((?x16 (+ 1 n)))
+(let ((?x17 (+ ?x16 1)))
+(let (($x11 (= (+ n 2) ?x17)))
+(let (($x24 (= ?x17 (+ ?x16 2))))
+(let (($x30 (=> (and (and true p) (not p)) (and (and $x24 $x11) true))))
+(not $x30)))))))
+(check-sat)
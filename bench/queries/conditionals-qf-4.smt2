@@ -0,0 +1,11 @@
+; origin: def f [slice 1/1] [qf]
+; result: sat
+; time: 0.000102s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun n () Int)
+(assert
+ (let (($x47 (and (= (+ n 2) (+ (+ n 1) 1)) (= (+ (+ n 1) 1) (+ n 1)))))
+(let (($x41 (and (=> and $x47))))
+(not $x41))))
+(check-sat)
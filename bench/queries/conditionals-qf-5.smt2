@@ -0,0 +1,12 @@
+; origin: def f [qf]
+; result: unsat
+; time: 0.000073s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun n () Int)
+(declare-fun p () Bool)
+(assert
+ (let (($x47 (and (= (+ n 2) (+ (+ n 1) 1)) (= (+ (+ n 1) 1) (+ n 1)))))
+(let (($x37 (=> (and (and true (not p)) p) (and $x47 true))))
+(not $x37))))
+(check-sat)
@@ -0,0 +1,10 @@
+; origin: def f [slice 1/1] [qf]
+; result: unsat
+; time: 0.000062s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun n () Int)
+(assert
+ (let (($x25 (and (=> and (and (= (+ (+ n 1) 1) (+ n 2)))))))
+(not $x25)))
+(check-sat)
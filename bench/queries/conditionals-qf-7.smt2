@@ -0,0 +1,10 @@
+; origin: def g [slice 1/1] [qf]
+; result: unsat
+; time: 0.000079s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun a () Int)
+(assert
+ (let (($x32 (and (=> and (and (= (+ a 1) (+ 1 a)))))))
+(not $x32)))
+(check-sat)
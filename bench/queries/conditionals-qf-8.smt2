@@ -0,0 +1,11 @@
+; origin: def h [slice 1/1] [qf]
+; result: unsat
+; time: 0.000101s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun b () Int)
+(declare-fun a () Int)
+(assert
+ (let (($x21 (and (=> (and (= a b)) (and (= a b))))))
+(not $x21)))
+(check-sat)
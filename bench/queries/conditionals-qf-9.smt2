@@ -0,0 +1,11 @@
+; origin: def j [slice 1/1] [qf]
+; result: unsat
+; time: 0.000627s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun a () Int)
+(assert
+ (let (($x34 (=> (and (>= a 0) (< a 1)) (and (= (+ a 5) 5)))))
+(let (($x20 (and $x34)))
+(not $x20))))
+(check-sat)
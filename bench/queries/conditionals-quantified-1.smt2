@@ -0,0 +1,10 @@
+; origin: def f [slice 1/1]
+; result: unsat
+; time: 0.000132s
+; benchmark generated from python API
+(set-info :status unknown)
+(assert
+ (forall ((n Int) )(let (($x59 (and (= (+ n 2) (+ (+ 1 n) 1)) (= (+ (+ 1 n) 1) (+ (+ 1 n) 2)))))
+(and (=> and $x59))))
+)
+(check-sat)
@@ -0,0 +1,10 @@
+; origin: def f
+; result: sat
+; time: 0.000089s
+; benchmark generated from python API
+(set-info :status unknown)
+(assert
+ (forall ((p Bool) (n Int) )(let (($x22 (and (= (+ (+ 1 n) 1) (+ (+ 1 n) 2)) (= (+ n 2) (+ (+ 1 n) 1)))))
+(=> (and (and true p) (not p)) (and $x22 true))))
+)
+(check-sat)
@@ -0,0 +1,10 @@
+; origin: def f [slice 1/1]
+; result: unsat
+; time: 0.000106s
+; benchmark generated from python API
+(set-info :status unknown)
+(assert
+ (forall ((n Int) )(let (($x24 (and (= (+ n 2) (+ (+ n 1) 1)) (= (+ (+ n 1) 1) (+ n 1)))))
+(and (=> and $x24))))
+)
+(check-sat)
@@ -0,0 +1,10 @@
+; origin: def f
+; result: sat
+; time: 0.000080s
+; benchmark generated from python API
+(set-info :status unknown)
+(assert
+ (forall ((p Bool) (n Int) )(let (($x24 (and (= (+ n 2) (+ (+ n 1) 1)) (= (+ (+ n 1) 1) (+ n 1)))))
+(=> (and (and true (not p)) p) (and $x24 true))))
+)
+(check-sat)
@@ -0,0 +1,12 @@
+; origin: Module at 1:1 [slice 1/1] [qf]
+; result: sat
+; time: 0.000801s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun |594| () Int)
+(declare-fun |588| () Int)
+(assert
+ (let (($x22 (=> and (and (= |588| |594|)))))
+(let (($x53 (and $x22 $x22)))
+(not $x53))))
+(check-sat)
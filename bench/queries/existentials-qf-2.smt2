@@ -0,0 +1,12 @@
+; origin: Module at 1:1 [qf]
+; result: sat
+; time: 0.000440s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun |594| () Int)
+(declare-fun |588| () Int)
+(assert
+ (let (($x23 (=> true (and (and (= |588| |594|)) true))))
+(let (($x65 (and $x23 $x23)))
+(not $x65))))
+(check-sat)
@@ -0,0 +1,14 @@
+; origin: Module at 1:1 [slice 1/1] [qf]
+; result: sat
+; time: 0.000860s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun |594| () Int)
+(declare-fun |588| () Int)
+(assert
+ (let (($x32 (= |588| |594|)))
+(let (($x28 (and $x32)))
+(let (($x22 (=> and $x28)))
+(let (($x53 (and $x22 $x22)))
+(not $x53))))))
+(check-sat)
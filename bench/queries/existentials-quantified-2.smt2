@@ -0,0 +1,10 @@
+; origin: Module at 1:1
+; result: unsat
+; time: 0.000084s
+; benchmark generated from python API
+(set-info :status unknown)
+(assert
+ (forall ((|605| Int) (|611| Int) )(let (($x64 (=> true (and (and (= |605| |611|)) true))))
+(and $x64 $x64)))
+)
+(check-sat)
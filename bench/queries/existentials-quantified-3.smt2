@@ -0,0 +1,10 @@
+; origin: Module at 1:1 [slice 1/1]
+; result: unsat
+; time: 0.000114s
+; benchmark generated from python API
+(set-info :status unknown)
+(assert
+ (forall ((|605| Int) (|611| Int) )(let (($x46 (=> and (and (= |605| |611|)))))
+(and $x46 $x46)))
+)
+(check-sat)
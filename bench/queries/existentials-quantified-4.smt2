@@ -0,0 +1,10 @@
+; origin: Module at 1:1
+; result: unsat
+; time: 0.000073s
+; benchmark generated from python API
+(set-info :status unknown)
+(assert
+ (forall ((|605| Int) (|611| Int) )(let (($x30 (=> true (and (and (= |605| |611|)) true))))
+(and $x30 $x30)))
+)
+(check-sat)
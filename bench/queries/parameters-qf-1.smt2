@@ -0,0 +1,12 @@
+; origin: def f [slice 1/2] [qf]
+; result: unsat
+; time: 0.000108s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun c () Int)
+(declare-fun d () Int)
+(assert
+ (let (($x54 (and (= (+ c d) (+ d c)) (= (+ (* c d) 1) (+ 1 (* d c))))))
+(let (($x63 (and (=> and $x54))))
+(not $x63))))
+(check-sat)
@@ -0,0 +1,11 @@
+; origin: def f [slice 2/2] [qf]
+; result: unsat
+; time: 0.000074s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun a () Int)
+(declare-fun b () Int)
+(assert
+ (let (($x58 (and (=> and (and (= (+ a b) (+ b a)))))))
+(not $x58)))
+(check-sat)
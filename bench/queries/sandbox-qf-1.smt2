@@ -0,0 +1,10 @@
+; origin: def f [slice 1/1] [qf]
+; result: sat
+; time: 0.000144s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun n () Int)
+(assert
+ (let (($x62 (and (=> and (and (= (+ n 2) (+ (+ 1 n) 2)))))))
+(not $x62)))
+(check-sat)
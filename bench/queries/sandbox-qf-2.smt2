@@ -0,0 +1,11 @@
+; origin: def f [qf]
+; result: unsat
+; time: 0.000089s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun n () Int)
+(declare-fun p () Bool)
+(assert
+ (let (($x40 (=> (and (and true p) (not p)) (and (and (= (+ n 2) (+ (+ 1 n) 2))) true))))
+(not $x40)))
+(check-sat)
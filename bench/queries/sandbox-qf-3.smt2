@@ -0,0 +1,10 @@
+; origin: def f [slice 1/1] [qf]
+; result: sat
+; time: 0.000096s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun n () Int)
+(assert
+ (let (($x34 (and (=> and (and (= (+ n 2) (+ n 1)))))))
+(not $x34)))
+(check-sat)
@@ -0,0 +1,11 @@
+; origin: def f [qf]
+; result: unsat
+; time: 0.000076s
+; benchmark generated from python API
+(set-info :status unknown)
+(declare-fun n () Int)
+(declare-fun p () Bool)
+(assert
+ (let (($x43 (=> (and (and true (not p)) p) (and (and (= (+ n 2) (+ n 1))) true))))
+(not $x43)))
+(check-sat)
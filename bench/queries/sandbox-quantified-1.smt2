@@ -0,0 +1,9 @@
+; origin: def f [slice 1/1]
+; result: unsat
+; time: 0.000142s
+; benchmark generated from python API
+(set-info :status unknown)
+(assert
+ (forall ((n Int) )(and (=> and (and (= (+ n 2) (+ (+ 1 n) 2))))))
+)
+(check-sat)
@@ -0,0 +1,9 @@
+; origin: def f
+; result: sat
+; time: 0.000093s
+; benchmark generated from python API
+(set-info :status unknown)
+(assert
+ (forall ((p Bool) (n Int) )(=> (and (and true p) (not p)) (and (and (= (+ n 2) (+ (+ 1 n) 2))) true)))
+)
+(check-sat)
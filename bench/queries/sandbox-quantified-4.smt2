@@ -0,0 +1,9 @@
+; origin: def f
+; result: sat
+; time: 0.000087s
+; benchmark generated from python API
+(set-info :status unknown)
+(assert
+ (forall ((p Bool) (n Int) )(=> (and (and true (not p)) p) (and (and (= (+ n 2) (+ n 1))) true)))
+)
+(check-sat)
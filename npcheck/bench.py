@@ -0,0 +1,269 @@
+import os
+import sys
+import gc
+import json
+import math
+import time
+import argparse
+import platform
+import tracemalloc
+import ast as A
+
+import npcheck as N
+import util as U
+import nptype as T
+import context as C
+from checker import Checker, CheckError, ConfusionError
+
+# scaling benchmarks: check synthetic programs of growing size and fit how the cost grows
+
+here = os.path.dirname(os.path.abspath(__file__))
+default_baselines = os.path.join(here, '..', 'bench', 'baselines.json')
+
+header = 'from nptyping import *\nimport numpy as np\n'
+
+# -------------------- program generators --------------------
+
+# n straight-line assignments, each using the previous one
+def assignments(n):
+    lines = ['a0 = np.zeros((3, 4))']
+    for i in range(1, n):
+        lines.append(f'a{i} = a{i - 1} + np.ones({"4" if i % 2 == 0 else "(1, 4)"})')
+    return header + '\n'.join(lines) + '\n'
+
+# n sequential ifs inside a function; each one doubles the number of contexts
+def ifs(n):
+    lines = ['def f(p: bool, n: int) -> array[n + 1]:', '    a = np.zeros(n + 1)']
+    for _ in range(n):
+        lines += [
+            '    if p:',
+            '        a = np.zeros(n + 1) + a',
+            '    else:',
+            '        a = a + np.ones(1 + n)']
+    lines.append('    return a')
+    return header + '\n'.join(lines) + '\n'
+
+# a curry-style lambda of depth n, applied to a function of n arguments
+def lambdas(n):
+    args = [f'x{i}' for i in range(n)]
+    curry = ''.join(f'lambda {a}: ' for a in args)
+    return header + '\n'.join([
+        f'def add(' + ', '.join(f'{a}: int' for a in args) + ') -> int:',
+        '    return ' + ' + '.join(args),
+        f'curry = lambda f: {curry}f({", ".join(args)})',
+        'r = curry(add)' + ''.join(f'({i})' for i in range(n))]) + '\n'
+
+# one expression broadcasting n arrays together
+def broadcasting(n):
+    shapes = ['(8, 1, 6, 1)', '(7, 1, 5)', '(6, 5)', '(1,)']
+    operands = [f'np.zeros({shapes[i % len(shapes)]})' for i in range(n)]
+    return header + 'a = ' + ' + '.join(operands) + '\n'
+
+benchmarks = {
+    'assignments': (assignments, [8, 16, 32, 64, 128]),
+    'ifs': (ifs, [1, 2, 3, 4, 5, 6]),
+    'lambdas': (lambdas, [1, 2, 4, 8, 16]),
+    'broadcasting': (broadcasting, [4, 8, 16, 32, 64]),
+}
+
+# -------------------- measurement --------------------
+
+def check(s):
+    c = Checker(N.rules, _ast_memo={}, _memo={})
+    try:
+        c.check(A.parse(s))
+        return 'OK'
+    except (CheckError, ConfusionError) as e:
+        return e.pretty(s)
+    except Exception as e:
+        return str(e)
+
+# metrics for checking program s: best wall time of repeat runs, peak traced memory,
+# and counts of analyze calls, contexts and z3 queries
+def measure(s, repeat=3):
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        U.stats.clear()
+        start = time.perf_counter()
+        result = check(s)
+        times.append(time.perf_counter() - start)
+    counts = dict(U.stats)
+
+    gc.collect()
+    tracemalloc.start()
+    check(s)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'result': result,
+        'time': min(times),
+        'memory': peak,
+        'analyze calls': counts.get('analyze calls', 0),
+        'contexts': counts.get('contexts', 0),
+        'z3 queries': counts.get('z3 queries', 0)}
+
+metrics = ['time', 'memory', 'analyze calls', 'contexts', 'z3 queries']
+
+# -------------------- memory footprint --------------------
+
+# bytes per object for the kinds of objects checks create the most of, each built n times
+# (children shared, so only the object itself and its own containers count)
+def footprint(n=10000):
+    var = T.UVar('n')
+    dim = T.AVar(var)
+    Γ = C.Context().copy() # as the checker gets them, with sets of names
+    for i in range(8):
+        Γ.annotate('x{}'.format(i), T.Array([dim, dim + 1]))
+    kinds = {
+        'UVar': lambda: T.UVar('n'),
+        'AVar': lambda: T.AVar(var),
+        'Add': lambda: T.Add(dim, dim),
+        'Array': lambda: T.Array([dim, dim]),
+        'Context': C.Context,
+        'Context.copy': Γ.copy,
+    }
+    sizes = {}
+    for name, make in kinds.items():
+        gc.collect()
+        tracemalloc.start()
+        objects = [make() for _ in range(n)]
+        current, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        sizes[name] = (current - sys.getsizeof(objects)) / n
+        del objects
+    return sizes
+
+# -------------------- growth curves --------------------
+
+# least-squares fit of y = a + b x, with the coefficient of determination
+def linear_fit(xs, ys):
+    n = len(xs)
+    mx, my = sum(xs) / n, sum(ys) / n
+    sxx = sum((x - mx) ** 2 for x in xs)
+    sxy = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    b = sxy / sxx if sxx > 0 else 0.0
+    a = my - b * mx
+    ss = sum((y - my) ** 2 for y in ys)
+    residual = sum((y - a - b * x) ** 2 for x, y in zip(xs, ys))
+    return a, b, 1 - residual / ss if ss > 0 else 1.0
+
+# fit cost ~ n^k and cost ~ b^n and keep whichever explains the data better
+def growth(sizes, values):
+    pairs = [(n, v) for n, v in zip(sizes, values) if v > 0]
+    if len(pairs) < 2:
+        return {'model': 'constant', 'k': 0.0, 'r2': 1.0}
+    ns, vs = zip(*pairs)
+    logs = [math.log(v) for v in vs]
+    _, k, r2_power = linear_fit([math.log(n) for n in ns], logs)
+    _, log_b, r2_exp = linear_fit(ns, logs)
+    if r2_exp > r2_power + 0.02 and log_b > 0.2:
+        return {'model': 'exponential', 'k': math.exp(log_b), 'r2': r2_exp}
+    return {'model': 'power', 'k': k, 'r2': r2_power}
+
+def describe(fit):
+    if fit['model'] == 'exponential':
+        return 'O({:.2f}^n)'.format(fit['k'])
+    if fit['model'] == 'constant':
+        return 'O(1)'
+    return 'O(n^{:.2f})'.format(fit['k'])
+
+def run(name, repeat=3, out=sys.stdout):
+    generate, sizes = benchmarks[name]
+    rows = []
+    for n in sizes:
+        row = measure(generate(n), repeat)
+        row['size'] = n
+        rows.append(row)
+        print('{:>14} n={:<4} {:>9.4f}s {:>10} B {:>7} analyze {:>7} contexts {:>5} queries{}'.format(
+            name, n, row['time'], row['memory'], row['analyze calls'],
+            row['contexts'], row['z3 queries'],
+            '' if row['result'] == 'OK' else ' (' + row['result'].split('\n')[-1] + ')'),
+            file=out)
+    fits = {m: growth(sizes, [r[m] for r in rows]) for m in metrics}
+    print('{:>14} growth: {}'.format(
+        name, ', '.join('{} {}'.format(m, describe(f)) for m, f in fits.items())), file=out)
+    return {'rows': rows, 'fits': fits, 'interpreter': interpreter()}
+
+# -------------------- baselines --------------------
+
+# time and memory depend on the interpreter a baseline was recorded under, so they are
+# only compared against baselines from the same implementation and minor version;
+# the counts are compared whatever the interpreter
+def interpreter():
+    return '{} {}.{}'.format(platform.python_implementation(), *sys.version_info[:2])
+
+interpreter_metrics = ['time', 'memory']
+
+# slack allowed over the baseline before calling something a regression
+tolerance = {
+    'exponent': 0.25, # on fitted power-law exponents and exponential bases
+    'counts': 1.10,   # on analyze calls, contexts and z3 queries
+}
+
+def regressions(name, result, baseline):
+    found = []
+    same = baseline.get('interpreter') == result['interpreter']
+    for m in metrics:
+        if m in interpreter_metrics and not same:
+            continue
+        new, old = result['fits'][m], baseline['fits'][m]
+        if old['model'] == 'power' and new['model'] == 'exponential':
+            found.append(f'{name}: {m} grows exponentially, was {describe(old)}')
+        elif new['model'] == old['model'] and new['k'] > old['k'] + tolerance['exponent']:
+            found.append(f'{name}: {m} grows as {describe(new)}, was {describe(old)}')
+    old_rows = {r['size']: r for r in baseline['rows']}
+    for row in result['rows']:
+        old = old_rows.get(row['size'])
+        if old is None:
+            continue
+        for m in ['analyze calls', 'contexts', 'z3 queries']:
+            if row[m] > old[m] * tolerance['counts']:
+                found.append(f'{name}: {row[m]} {m} at n={row["size"]}, was {old[m]}')
+    return found
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Scaling benchmarks for npcheck.')
+    parser.add_argument('names', nargs='*', default=list(benchmarks),
+        help='benchmarks to run (default: all of {})'.format(', '.join(benchmarks)))
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs per size')
+    parser.add_argument('--baselines', default=default_baselines, help='baseline file')
+    parser.add_argument('--save', action='store_true', help='record results as the new baselines')
+    parser.add_argument('--check', action='store_true',
+        help='exit with status 1 if any benchmark grows faster than its baseline')
+    parser.add_argument('--memory', action='store_true',
+        help='report bytes per type term and per Context instead of running benchmarks')
+    args = parser.parse_args()
+
+    if args.memory:
+        for name, size in footprint().items():
+            print('{:>14} {:>8.1f} B'.format(name, size))
+        sys.exit(0)
+
+    results = {name: run(name, args.repeat) for name in args.names}
+
+    if args.save:
+        baselines = {}
+        if os.path.exists(args.baselines):
+            with open(args.baselines) as f:
+                baselines = json.load(f)
+        baselines.update(results)
+        os.makedirs(os.path.dirname(args.baselines), exist_ok=True)
+        with open(args.baselines, 'w') as f:
+            json.dump(baselines, f, indent=1, sort_keys=True)
+
+    if args.check:
+        with open(args.baselines) as f:
+            baselines = json.load(f)
+        for name, result in results.items():
+            if name in baselines and baselines[name].get('interpreter') != result['interpreter']:
+                print('{}: baseline recorded under {}, not {}; comparing counts only'.format(
+                    name, baselines[name].get('interpreter', 'an unknown interpreter'),
+                    result['interpreter']))
+        found = [r
+            for name, result in results.items() if name in baselines
+            for r in regressions(name, result, baselines[name])]
+        for r in found:
+            print(r)
+        sys.exit(1 if len(found) > 0 else 0)
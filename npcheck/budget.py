@@ -0,0 +1,38 @@
+# limits on the time z3 spends checking a file
+#
+#   util.budget = Budget(query=10, total=60)
+#   ... check something ...
+#   print(util.budget.report())
+#
+# each query gets at most query seconds and at most what is left of total. once total is
+# used up no more queries are made, and the constraints they would have decided are
+# reported as undecided (util.SolverUnknown) rather than unsatisfiable
+
+class Budget:
+    def __init__(self, query=None, total=None):
+        self.query = query   # seconds per query, or None
+        self.total = total   # seconds for all queries, or None
+        self.spent = 0.      # seconds spent in the solver so far
+        self.queries = 0
+        self.undecided = []  # (origin, reason) for constraints z3 couldn't decide
+
+    def exhausted(self):
+        return self.total is not None and self.spent >= self.total
+
+    # seconds the next query may take, or None for no limit
+    def allowance(self):
+        limits = [t for t in [self.query, None if self.total is None else self.total - self.spent]
+                  if t is not None]
+        return min(limits) if len(limits) > 0 else None
+
+    def spend(self, elapsed):
+        self.queries += 1
+        self.spent += elapsed
+
+    def report(self):
+        limit = '' if self.total is None else ' of a {:g}s budget'.format(self.total)
+        lines = ['{} z3 queries, {:.4f}s{}, {} undecided'.format(
+            self.queries, self.spent, limit, len(self.undecided))]
+        for origin, reason in self.undecided:
+            lines.append('  {}: {}'.format(origin, reason))
+        return '\n'.join(lines)
@@ -1,9 +1,18 @@
 import util as U
+import os
+import sys
+import ast
 import inspect
+import marshal
+import hashlib
+import importlib.util
 
-callback_names = map(
-    lambda a: '__callback{}__'.format(a),
-    U.make_fresh())
+# a line of generated source, remembering the line of the original file it came from
+class Line(str):
+    def __new__(cls, s, origin):
+        line = str.__new__(cls, s)
+        line.origin = origin
+        return line
 
 def callbacks(context, debug=False):
     """
@@ -71,11 +80,20 @@ def callbacks(context, debug=False):
         runs the loop body with the proper callbacks
         accumulates the values yielded by each loop iteration in l1
         runs the code 'after' the loop with l1 and updated α, β, ..
+
+    the fresh functions are named after f (f_k0, f_loop1, ..) and the generated code
+    is compiled with the line numbers of the lines of f it came from, so that
+    tracebacks and profiles of the callbacks point into f's own source
     """
     def decorator(f):
+        fresh = U.make_fresh()
+        callback_name = lambda: '{}_k{}'.format(f.__name__, next(fresh))
+        loop_name = lambda: '{}_loop{}'.format(f.__name__, next(fresh))
+        rest_name = lambda: '{}_rest{}'.format(f.__name__, next(fresh))
+
         def indent(lines, level=4):
             space= ' ' * level
-            return [(space + l if len(l.strip()) > 0 else '') for l in lines]
+            return [Line(space + l if len(l.strip()) > 0 else '', l.origin) for l in lines]
 
         def is_callback(line):
             return ' <- ' in line
@@ -90,7 +108,7 @@ def callbacks(context, debug=False):
 
         def maximally_dedent(lines):
             level = min(map(indent_level, lines))
-            return [s[level:] for s in lines]
+            return [Line(s[level:], s.origin) for s in lines]
 
         def is_for(line):
             if 'for' not in line:
@@ -104,6 +122,7 @@ def callbacks(context, debug=False):
             return True
 
         def go_for(line, body, rest, nonlocals=set()):
+            origin = line.origin
             tokens = [t
                 for token in line.split()
                 for t in [token.replace(',', '').replace(':', '')]
@@ -115,7 +134,7 @@ def callbacks(context, debug=False):
             values = ', '.join(values)
             captures = ''.join(a + ', ' for a in captures)
 
-            loop, l2 = next(callback_names), next(callback_names)
+            loop, l2 = loop_name(), rest_name()
 
             level = min(map(indent_level, body + rest))
             body = maximally_dedent(body)
@@ -127,20 +146,20 @@ def callbacks(context, debug=False):
                     continue
                 found_yield = True
                 _, yielded = line.split(None, 1)
-                body[i] = (' ' * indent_level(line) +
-                    f'return {loop}({l2}, {captures} {l1} + (({yielded}),))')
+                body[i] = Line(' ' * indent_level(line) +
+                    f'return {loop}({l2}, {captures} {l1} + (({yielded}),))', line.origin)
             if not found_yield:
-                body.append(f'return {loop}({l2}, {captures} {l1} + (None,))')
+                body.append(Line(f'return {loop}({l2}, {captures} {l1} + (None,))', origin))
             header = \
-                [f'def {loop}({l2}, {captures} {l1}=()):'] + indent(
-                    [f'if {l2} != ():'] + indent(
-                        [f'({values}), {l2} = {l2}[0], {l2}[1:]']))
+                [Line(f'def {loop}({l2}, {captures} {l1}=()):', origin)] + indent(
+                    [Line(f'if {l2} != ():', origin)] + indent(
+                        [Line(f'({values}), {l2} = {l2}[0], {l2}[1:]', origin)]))
             return indent(
                 header +
                 indent(indent(go(body, nonlocals))) + # TODO: update nonlocals properly
-                indent(['else:']) +
+                indent([Line('else:', origin)]) +
                 indent(indent(go(rest, nonlocals))) +
-                [f'return {loop}(tuple({l}), {captures} {l1}=())'], level)
+                [Line(f'return {loop}(tuple({l}), {captures} {l1}=())', origin)], level)
 
         def go(lines, nonlocals=set()):
             if lines == []:
@@ -164,7 +183,7 @@ def callbacks(context, debug=False):
             args = args.strip()
             call = call.strip()
 
-            callback = next(callback_names)
+            callback = callback_name()
             header = f'def {callback}({args}):'
             footer = 'return {}{}{})'.format(
                 call[:-1],
@@ -173,29 +192,90 @@ def callbacks(context, debug=False):
 
             argnames = set(args.split(', '))
             return (
-                [level * ' ' + header] +
-                indent([level * ' ' + 'nonlocal ' + a for a in nonlocals - argnames]) + 
+                [Line(level * ' ' + header, line.origin)] +
+                indent([Line(level * ' ' + 'nonlocal ' + a, line.origin)
+                    for a in nonlocals - argnames]) +
                 go(indent(body), nonlocals | argnames) +
-                [level * ' ' + footer] +
+                [Line(level * ' ' + footer, line.origin)] +
                 go(rest, nonlocals | argnames))
 
-        lines = inspect.getsource(f).split('\n')
-        lines = lines[1:] # drop decorator header
-        decl, lines = lines[0], lines[1:] # grab declaration
-        args = set(a
-            for a in decl[decl.index('(') + 1 : decl.index(')')].split(', ')
-            if '=' not in a)
+        source, start = inspect.getsourcelines(f)
+        filename = inspect.getsourcefile(f)
+
+        def rewrite():
+            lines = [Line(l, start + i) for i, l in enumerate(''.join(source).split('\n'))]
+            lines = lines[1:] # drop decorator header
+            decl, lines = lines[0], lines[1:] # grab declaration
+            args = set(a
+                for a in decl[decl.index('(') + 1 : decl.index(')')].split(', ')
+                if '=' not in a)
 
-        src = maximally_dedent([decl] + go(lines, args))
-        src = '\n'.join(src)
+            lines = maximally_dedent([decl] + go(lines, args))
 
-        if debug:
-            print(src)
-        exec(src, context)
+            if debug:
+                print('\n'.join('{:>5} {}'.format(l.origin, l) for l in lines))
+            return compile_mapped(lines, filename)
+
+        code = rewrite() if debug else cached(filename, start, ''.join(source), rewrite)
+        exec(code, context)
         return context[f.__name__]
 
     return decorator
 
+# -------------------- compiled code cache --------------------
+
+# directory holding the marshalled code of rewritten functions; set NPCHECK_CACHE to
+# move it, or to the empty string to turn the cache off
+cache_dir = os.environ.get(
+    'NPCHECK_CACHE',
+    os.path.join(
+        os.environ.get('XDG_CACHE_HOME', os.path.join(os.path.expanduser('~'), '.cache')),
+        'npcheck'))
+
+# the rewriter itself is part of every key, so editing this file invalidates the cache
+with open(__file__, 'rb') as f:
+    rewriter_digest = hashlib.sha1(f.read()).digest()
+
+# code for the function with source beginning at line start of filename, from the cache
+# if it has been rewritten before, and from rewrite : () -> code otherwise
+def cached(filename, start, source, rewrite):
+    if cache_dir == '':
+        return rewrite()
+    key = hashlib.sha1(b'\0'.join([
+        importlib.util.MAGIC_NUMBER,
+        rewriter_digest,
+        os.path.abspath(filename).encode(),
+        str(start).encode(),
+        source.encode()])).hexdigest()
+    path = os.path.join(cache_dir, key + '.code')
+    try:
+        with open(path, 'rb') as f:
+            return marshal.load(f)
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    code = rewrite()
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write then rename, so concurrent checks never read a partial file
+        tmp = '{}.{}.tmp'.format(path, os.getpid())
+        with open(tmp, 'wb') as f:
+            marshal.dump(code, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+    return code
+
+# compile generated lines, numbering each node with the line it came from in filename
+def compile_mapped(lines, filename):
+    tree = ast.parse('\n'.join(lines))
+    for node in ast.walk(tree):
+        if hasattr(node, 'lineno'):
+            node.lineno = lines[node.lineno - 1].origin
+            # generated nodes can span lines that are out of order in the original
+            if hasattr(node, 'end_lineno'):
+                node.end_lineno = node.end_col_offset = None
+    return compile(tree, filename, 'exec')
+
 if __name__ == '__main__':
     def g(a, callback):
         return callback(a, a + 1)
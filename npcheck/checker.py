@@ -3,6 +3,7 @@ import pattern as P
 import context as C
 import ast as A
 import nptype as T
+import slicing
 from callbacks import callbacks
 
 typerule = callbacks
@@ -12,6 +13,8 @@ typerule = callbacks
 # action : Checker * Context * ..kwargs -> [Context * ?a]
 # names of arguments should match names of capture groups in pattern
 class Rule:
+    __slots__ = ('s', 'pattern', 'action', 'name')
+
     def __init__(self, pattern, action, name=None):
         self.s = pattern if type(pattern) is str else None
         self.pattern = P.make_pattern(pattern) if type(pattern) is str else pattern
@@ -24,6 +27,39 @@ class Rule:
         else:
             return '{} ({})'.format(P.pretty(P.explode(self.pattern)), self.name)
 
+    # the rules to run on ast, with their captures: [Rule * {capture: AST}]
+    def matches(self, ast):
+        a = P.matches(self.pattern, ast)
+        return [] if a is None else [(self, a)]
+
+# rules looked up by the attribute name of the node they apply to, e.g. 'dot' for
+# np.dot(a, b) and a.dot(b), or 'T' for a.T
+# table maps names to entries that compile : name * entry -> Rule turns into rules, the
+# first time a node with that name is seen, so nodes only try the rules for their name
+class IndexedRule(Rule):
+    __slots__ = ('table', 'compile', 'compiled')
+
+    def __init__(self, table, compile, name=None):
+        self.s = None
+        self.pattern = None
+        self.action = None
+        self.name = name
+        self.table = table
+        self.compile = compile
+        self.compiled = {} # name -> [Rule]
+
+    def __str__(self):
+        return '{} ({} names)'.format(self.name, len(self.table))
+
+    def matches(self, ast):
+        attribute = ast.func if type(ast) is A.Call else ast
+        if type(attribute) is not A.Attribute or attribute.attr not in self.table:
+            return []
+        name = attribute.attr
+        if name not in self.compiled:
+            self.compiled[name] = [self.compile(name, entry) for entry in self.table[name]]
+        return [match for rule in self.compiled[name] for match in rule.matches(ast)]
+
 # checker failed at some ast node
 class ASTError(Exception):
     def __init__(self, ast):
@@ -42,17 +78,33 @@ class CheckError(ASTError):
                 r.name,
                 U.indent('  ', str(e))) for r, e in self.errors))
 
+    # chains of errors leading from this one to each failure of a rule
+    def paths(self):
+        paths = []
+        for _, e in self.errors:
+            sub = e.paths() if type(e) is CheckError else [[e]]
+            paths.extend([self] + p for p in sub)
+        return paths
+
+    # the failures pretty would report, as (ast, message) pairs
+    def diagnostics(self):
+        paths = self.paths()
+        unbound = lambda p: 'Unbound identifier' in str(p[-1])
+        value_errors = [p for p in paths if type(p[-1]) is ValueError and not unbound(p)]
+        confusion_errors = [p for p in paths if type(p[-1]) is ConfusionError]
+        if len(paths) > 1 and len(value_errors) > 0:
+            paths = value_errors
+        elif len(paths) > 1 and len(confusion_errors) > 0:
+            paths = confusion_errors
+        return [
+            pair
+            for p in paths
+            for pair in (p[-1].diagnostics() if type(p[-1]) is ConfusionError else
+                         [(p[-2].ast, str(p[-1]))])]
+
     # pretty-print the error, where s is the source code that was being analyzed
     def pretty(self, s):
-        def error_paths(self):
-            if type(self) is not CheckError:
-                return [[self]]
-            paths = []
-            for _, e in self.errors:
-                paths.extend([[self] + p for p in error_paths(e)])
-            return paths
-
-        paths = error_paths(self)
+        paths = self.paths()
 
         def pretty(e):
             if type(e[-1]) is ConfusionError:
@@ -104,40 +156,59 @@ class ConfusionError(ASTError):
         self.ast = ast
     def pretty(self, s):
         return '{}\nNo applicable rule'.format(U.highlight(self.ast, s))
+    def diagnostics(self):
+        return [(self.ast, 'No applicable rule')]
 
 no_op = lambda s, a: [(s, a)]
 
 # type-checker acting on a set of checking rules
 class Checker:
-    def __init__(self, rules, return_type=T.TNone(), careful=False, _ast_memo={}, _memo={}):
+    def __init__(self, rules, return_type=T.TNone(), careful=False, profiler=None,
+                 adapt=None, _ast_memo={}, _memo={}, _extended=None):
         self.rules = rules
         self.return_type = return_type
         self.careful = careful
+        # optional profiler.RuleProfiler recording per-rule counts and timings
+        self.profiler = profiler
+        # optional Rule -> Rule applied to the rules imports add, as to the ones passed in
+        # (lsp.Document.watch)
+        self.adapt = adapt
         # memoize past queries (remember which rules worked & the results they yielded)
+        # _ast_memo is keyed by rule list as well as ast shape, since imports extend the rules
         self._ast_memo = _ast_memo
         self._memo = _memo
+        # rule lists extended by imports, so that checks sharing _ast_memo share them too
+        # (id of rule list, import) -> (rule list, extended list)
+        self._extended = {} if _extended is None else _extended
 
     def carefully(self):
         return Checker(
             self.rules,
             return_type = self.return_type,
             careful = True,
+            profiler = self.profiler,
+            adapt = self.adapt,
             _ast_memo = self._ast_memo,
-            _memo = self._memo)
+            _memo = self._memo,
+            _extended = self._extended)
 
     def returning(self, r):
         return Checker(
             self.rules,
             return_type = r,
             careful = self.careful,
+            profiler = self.profiler,
+            adapt = self.adapt,
             _ast_memo = self._ast_memo,
-            _memo = self._memo)
+            _memo = self._memo,
+            _extended = self._extended)
 
     # try each of the rules in order and run action corresponding to first matching rule
     # Checker * [Context] * AST * (Context * a -> [Context * b]) -> [Context * b]
     # fail with ConfusionError if no rules match
     # fail with CheckError if all rules that matched threw
     def analyze(self, Γs, ast, f = no_op):
+        U.stats['analyze calls'] += 1
         k_ast = P.simplify(ast)
         k = (ast, tuple(Γs))
         possible_errors = (ValueError, CheckError, ConfusionError, T.UnificationError)
@@ -151,22 +222,35 @@ class Checker:
             options = a
             self._memo[k] = (hits + 1, options)
         else:
-            if k_ast in self._ast_memo:
-                ast_hits, matches = self._ast_memo[k_ast]
+            # remember which rules apply to each shape of ast, but redo the (cheap) capture
+            # for the rules that do: the captured nodes must come from this ast, not from an
+            # earlier one that happened to look the same
+            k_rules = (id(self.rules), k_ast)
+            if k_rules in self._ast_memo:
+                ast_hits, _, rules = self._ast_memo[k_rules]
+                matches = [(rule, P.matches(rule.pattern, ast)) for rule in rules]
+                # count every rule as tried, as a miss would, so the profile doesn't
+                # depend on what was memoized
+                if self.profiler is not None:
+                    self.profiler.tried(self.rules, rules)
             else:
                 ast_hits = 0
-                matches = [(rule, a)
-                    for rule in self.rules
-                    for a in [P.matches(rule.pattern, ast)]
-                    if a is not None]
-            self._ast_memo[k_ast] = (ast_hits + 1, matches)
+                matches = [match for rule in self.rules for match in rule.matches(ast)]
+                rules = [rule for rule, _ in matches]
+                if self.profiler is not None:
+                    self.profiler.tried(self.rules, rules)
+            # holding on to self.rules keeps its id from being reused while memoized
+            self._ast_memo[k_rules] = (ast_hits + 1, self.rules, rules)
 
             options = []
             for Γ in Γs:
                 errors = []
                 for rule, match in matches:
                     try:
-                        options.append((rule, rule.action(self, Γ.copy(), **match)))
+                        if self.profiler is None and U.tracer is None:
+                            options.append((rule, rule.action(self, Γ.copy(), **match)))
+                        else:
+                            options.append((rule, self.instrumented(rule, Γ.copy(), ast, match)))
                     except possible_errors as e:
                         errors.append((rule, e))
                 if options == []:
@@ -184,19 +268,36 @@ class Checker:
                 errors.append((rule, e))
         raise ConfusionError(ast) if errors == [] else CheckError(ast, errors)
 
+    # run rule's action on ast through the profiler and tracer, whichever are on
+    def instrumented(self, rule, Γ, ast, match):
+        run = lambda: (rule.action(self, Γ, **match) if self.profiler is None else
+                       self.profiler.call(rule, self, Γ, match))
+        if U.tracer is None:
+            return run()
+        with U.tracer.rule(rule, ast):
+            return run()
+
     def check(self, ast):
+        if U.checks == 0:
+            U.fresh_ids = U.make_fresh()
+            slicing.verified.clear()
+        U.checks += 1
+        T.z3_terms.clear()
         try:
             pairs = self.analyze([C.Context()], ast)
             state = C.State([s for s, _ in pairs])
-            return U.verify(state)
+            return U.verify(state, U.describe(ast))
         except (ValueError, CheckError, T.UnificationError) as e:
             if not self.careful and 'Unsatisfiable constraint' in str(e):
-                self.carefully().check(ast)
+                return self.carefully().check(ast)
             else:
                 raise
+        finally:
+            U.checks -= 1
+            T.z3_terms.clear()
 
     def dump_memo(self, s):
-        for ast, (hits, rules) in sorted(self._ast_memo.items(), key=lambda a: a[1][0]):
+        for (_, ast), (hits, _, rules) in sorted(self._ast_memo.items(), key=lambda a: a[1][0]):
             print('{}\n{} hits ({} rules)'.format(ast, hits, len(rules)))
         for (ast, Γs), (hits, _) in sorted(self._memo.items(), key=lambda a: a[1][0]):
             print('{}\n{} hits ({})'.format(U.highlight(ast, s), hits, type(ast).__name__))
@@ -255,7 +356,7 @@ def analyze_body(self, Γ, body, k=no_op):
     for a in __, Γ <- body: 
         Γ, _ <- self.analyze([Γ], a)
         if self.careful: 
-            U.verify(Γ)
+            U.verify(Γ, U.describe(a))
     return k(Γ, None)
 
 module = Rule(P.raw_pattern('__body'), analyze_body, 'module')
@@ -354,7 +455,7 @@ def analyze_fun_def(self, Γ, f, args, return_type, body):
     #print('polymorphic_fun_type =', polymorphic_fun_type)
 
     Γ1, _ <- analyze_body(self.returning(r), nested_Γ, body)
-    U.verify(Γ1)
+    U.verify(Γ1, 'def ' + f)
     return [(Γ.annotate(f, polymorphic_fun_type), None)]
 
 fun_def = Rule('def _f(__args) -> _return_type:\n    __body', analyze_fun_def, 'fun_def')
@@ -379,7 +480,7 @@ int_le = binary_operator('<=', T.AVar, T.Le, 'int_le')
 int_ge = binary_operator('>=', T.AVar, T.Ge, 'int_ge')
 
 asrt = Rule('assert _a', lambda self, Γ, a:
-    self.analyze([Γ], a, lambda Γ, e: [(Γ.assume(e), None)]))
+    self.analyze([Γ], a, lambda Γ, e: [(Γ.assume(e), None)]), 'assert')
 
 ret = Rule('return _a', lambda self, Γ, a:
     self.analyze([Γ], a, lambda Γ, t:
@@ -411,7 +512,7 @@ fun_call = Rule('_f(__args)', analyze_fun_call, 'fun_call')
 print_expr = expression('print(_a)', {'a': T.UVar('a')}, T.TNone(), 'print_expr')
 print_stmt = Rule(
     P.raw_pattern('print(_a)').body[0],
-    lambda self, Γ, a: self.analyze([Γ], a, lambda Γ, _: [(Γ, None)]))
+    lambda self, Γ, a: self.analyze([Γ], a, lambda Γ, _: [(Γ, None)]), 'print_stmt')
 
 @typerule(globals())
 def analyze_lambda_expr(self, Γ, args, e):
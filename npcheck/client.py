@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import time
+import socket
+import subprocess
+
+# thin client for daemon.py, usable in place of npcheck.py
+# deliberately imports nothing from the checker, so it starts as fast as python does
+
+here = os.path.dirname(os.path.abspath(__file__))
+
+def socket_path():
+    return os.environ.get(
+        'NPCHECK_SOCKET',
+        os.path.join(
+            os.environ.get('XDG_RUNTIME_DIR', '/tmp'),
+            'npcheck-{}.sock'.format(os.getuid())))
+
+def connect(path):
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        conn.connect(path)
+    except OSError:
+        conn.close()
+        return None
+    return conn
+
+# connect to the daemon, starting one if none is listening
+def connect_or_spawn(path, wait=10.0):
+    conn = connect(path)
+    if conn is not None:
+        return conn
+    subprocess.Popen(
+        [sys.executable, os.path.join(here, 'daemon.py'), '--socket', path],
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        start_new_session=True)
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        conn = connect(path)
+        if conn is not None:
+            return conn
+    return None
+
+def request(conn, argv):
+    with conn:
+        conn.sendall((json.dumps({'argv': argv, 'cwd': os.getcwd()}) + '\n').encode())
+        chunks = []
+        while True:
+            chunk = conn.recv(1 << 16)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b''.join(chunks).decode())['output']
+
+if __name__ == '__main__':
+    conn = connect_or_spawn(socket_path())
+    if conn is None:
+        # no daemon: check in this process instead
+        checker = os.path.join(here, 'npcheck.py')
+        os.execv(sys.executable, [sys.executable, checker] + sys.argv[1:])
+    print(request(conn, sys.argv[1:]))
@@ -4,13 +4,19 @@ import nptype as T
 import substitution as S
 import ast as A
 
+# order of representatives in every Context's substitution (one function for all of them)
+precedes = lambda a, b: a << b
+
 # substitution map + typing environment under some precondition
 class Context:
+    __slots__ = ('σ', 'Γ', 'assumptions', 'requirements', 'names', 'fixed', 'hash', 'simple')
+
     def __init__(self):
-        self.σ = S.Substitution(lambda a, b: a << b)
+        U.stats['contexts'] += 1
+        self.σ = S.Substitution(precedes)
         self.Γ = {}
-        self.assumes = T.BLit(True)
-        self.requires = T.BLit(True)
+        self.assumptions = {} # conjuncts of assumes, in order (values unused)
+        self.requirements = {} # conjuncts of requires, in order (values unused)
         self.names = {}
         self.fixed = {}
         self.hash = None
@@ -27,6 +33,15 @@ class Context:
     def __contains__(self, a):
         return a in self.Γ
 
+    # preconditions and obligations, as T.Conj
+    @property
+    def assumes(self):
+        return T.Conj(self.assumptions)
+
+    @property
+    def requires(self):
+        return T.Conj(self.requirements)
+
     def renamed(self, renaming):
         renamed = lambda a: a.renamed(renaming) if hasattr(a, 'under') else a
 
@@ -36,15 +51,15 @@ class Context:
         c.σ.equalities = {(renamed(l), renamed(r)) for l, r in self.σ.equalities}
         c.σ.bias = self.σ.bias
         c.Γ = dict((renamed(k), renamed(v)) for k, v in self.Γ.items())
-        c.assumes = renamed(self.assumes)
-        c.requires = renamed(self.requires)
+        c.assumptions = T.ordered_conjuncts(map(renamed, self.assumptions))
+        c.requirements = T.ordered_conjuncts(map(renamed, self.requirements))
         c.names = {(renaming[a] if a in renaming else a) for a in self.names}
         c.fixed = {(renaming[a] if a in renaming else a) for a in self.names}
         return c
 
     def reduced(self):
         if self.simple is None:
-            self.simple = self.renamed(dict(zip(sorted(self.names), U.make_fresh())))
+            self.simple = self.renamed(dict(zip(sorted(self.names, key=U.name_order), U.make_fresh())))
         return self.simple
 
     def __hash__(self):
@@ -70,8 +85,8 @@ class Context:
         c = Context()
         c.σ = self.σ.copy()
         c.Γ = dict(self.Γ)
-        c.assumes = self.assumes
-        c.requires = self.requires
+        c.assumptions = dict(self.assumptions)
+        c.requirements = dict(self.requirements)
         c.names = set(self.names)
         c.fixed = set(self.fixed)
         c.hash = self.hash
@@ -103,8 +118,8 @@ class Context:
         self.σ.gen(names)
         for k, v in self.Γ.items():
             self.Γ[k] = self.Γ[k].gen(names)
-        self.assumes = self.assumes.gen(names)
-        self.requires = self.requires.gen(names)
+        self.assumptions = T.ordered_conjuncts(a.gen(names) for a in self.assumptions)
+        self.requirements = T.ordered_conjuncts(a.gen(names) for a in self.requirements)
         self.hash = self.simple = None
         return t
 
@@ -122,13 +137,15 @@ class Context:
         return self
 
     def assume(self, G):
-        self.assumes = T.And(self.assumes, G.under(self))
+        for a in T.conjuncts(G.under(self)):
+            self.assumptions[a] = None
         self.names |= U.names_of(G)
         self.hash = self.simple = None
         return self
 
     def require(self, G):
-        self.requires = T.And(self.requires, G.under(self))
+        for a in T.conjuncts(G.under(self)):
+            self.requirements[a] = None
         self.names |= U.names_of(G)
         self.hash = self.simple = None
         return self
@@ -154,6 +171,8 @@ class Context:
 
 # multiple possible Contexts + ability to branch on new conditions
 class State:
+    __slots__ = ('contexts',)
+
     def __init__(self, contexts = None):
         self.contexts = [Context()] if contexts is None else contexts
 
@@ -0,0 +1,166 @@
+import os
+import sys
+import io
+import gc
+import json
+import socket
+import argparse
+import ast as A
+import contextlib
+import collections
+
+# importing npcheck builds the stock rules, compiles their patterns, desugars the
+# @typerule functions and loads z3 once for the lifetime of the daemon
+import npcheck as N
+import summary as S
+from checker import Checker
+
+def default_socket():
+    return os.environ.get(
+        'NPCHECK_SOCKET',
+        os.path.join(
+            os.environ.get('XDG_RUNTIME_DIR', '/tmp'),
+            'npcheck-{}.sock'.format(os.getuid())))
+
+# resident set size in bytes
+def rss():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+# modification stamp of a file, or None if it can't be read
+def stamp(path):
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size)
+
+# sources of the checker itself; if any of these change the daemon restarts
+def own_sources():
+    here = os.path.dirname(os.path.abspath(__file__))
+    return {os.path.join(here, f): stamp(os.path.join(here, f))
+        for f in os.listdir(here) if f.endswith('.py')}
+
+# stamps of what checking the file at path reads: the file, and the modules it imports
+# from next to it (see summary.py) with their summaries, transitively
+def inputs(path):
+    stamps = {}
+    todo = [path]
+    while len(todo) > 0:
+        p = todo.pop()
+        if p in stamps:
+            continue
+        stamps[p] = stamp(p)
+        if p != path:
+            stamps[S.summary_path(p)] = stamp(S.summary_path(p))
+        try:
+            with open(p) as f:
+                tree = A.parse(f.read())
+        except (OSError, SyntaxError, ValueError):
+            continue
+        todo.extend(S.dependencies(tree, [os.path.dirname(p)]))
+    return stamps
+
+class Daemon:
+    def __init__(self, path, max_memory=1 << 30, idle_timeout=None):
+        self.path = path
+        self.max_memory = max_memory
+        self.idle_timeout = idle_timeout
+        self.sources = own_sources()
+        # abspath -> (inputs, argv, report), least recently used first
+        self.files = collections.OrderedDict()
+
+    # run one npck invocation, reusing the last report for the file if it hasn't changed
+    def check(self, argv, cwd):
+        out = io.StringIO()
+        try:
+            with contextlib.redirect_stdout(out), contextlib.redirect_stderr(out):
+                args = N.parse_args(argv)
+        except SystemExit:
+            return out.getvalue().rstrip('\n')
+
+        os.chdir(cwd)
+        path = os.path.abspath(args.file)
+        # runs that write files have to happen every time
+        writes = args.emit_summary or args.trace is not None or args.dump_queries is not None
+        s = None if writes else inputs(path)
+        if path in self.files:
+            old_inputs, old_argv, report = self.files.pop(path)
+            if s is not None and s[path] is not None and (old_inputs, old_argv) == (s, argv):
+                self.files[path] = (s, argv, report)
+                return report
+
+        # fresh memo tables: entries are keyed by ast nodes of the previous parse
+        report = N.run(args, Checker(N.rules_for(path), _ast_memo={}, _memo={}))
+        if s is not None and s[path] is not None:
+            self.files[path] = (s, argv, report)
+        return report
+
+    # evict least recently checked files until under the memory cap
+    # return False if that isn't enough, in which case the daemon should exit
+    def trim(self):
+        if rss() <= self.max_memory:
+            return True
+        while len(self.files) > 0 and rss() > self.max_memory:
+            self.files.popitem(last=False)
+            gc.collect()
+        return rss() <= self.max_memory
+
+    def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        server.bind(self.path)
+        os.chmod(self.path, 0o600)
+        server.listen(16)
+        server.settimeout(self.idle_timeout)
+        restart = False
+        try:
+            while True:
+                try:
+                    conn, _ = server.accept()
+                except socket.timeout:
+                    break
+                with conn:
+                    try:
+                        request = json.loads(recv_line(conn))
+                        report = self.check(request['argv'], request['cwd'])
+                    except Exception as e:
+                        report = str(e)
+                    conn.sendall((json.dumps({'output': report}) + '\n').encode())
+                if own_sources() != self.sources:
+                    restart = True
+                    break
+                if not self.trim():
+                    break
+        finally:
+            server.close()
+            if os.path.exists(self.path):
+                os.unlink(self.path)
+        if restart:
+            os.execv(sys.executable, [sys.executable] + sys.argv)
+
+def recv_line(conn):
+    chunks = []
+    while True:
+        chunk = conn.recv(1 << 16)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith(b'\n'):
+            break
+    return b''.join(chunks).decode()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Keep npcheck warm and serve checks over a unix socket.')
+    parser.add_argument('--socket', default=default_socket(), help='socket path')
+    parser.add_argument('--max-memory', type=int, default=1024,
+        help='evict cached files (or exit) when resident memory exceeds this many MiB')
+    parser.add_argument('--idle-timeout', type=float, default=30 * 60,
+        help='exit after this many seconds without requests')
+    args = parser.parse_args()
+    Daemon(args.socket, args.max_memory << 20, args.idle_timeout).serve()
@@ -0,0 +1,67 @@
+import z3
+
+# quantifier-free versions of the ∀ uvars ∃ evars F queries made by util.verify
+#
+# an equation e == t that F requires, with e existential and t not mentioning e, proposes
+# t as the witness for e (a skolem function of the other variables). substituting
+# witnesses for every evar leaves a formula G without existentials, and G holding for all
+# values of its variables, i.e. ¬G having no model, implies the quantified query. the
+# converse fails, e.g. when branches of F need different witnesses for the same evar, so
+# util.holds falls back to the quantified query when ¬G has a model
+
+# subterms of F, each once
+def subterms(F):
+    seen = set()
+    todo = [F]
+    while len(todo) > 0:
+        t = todo.pop()
+        if t.get_id() in seen:
+            continue
+        seen.add(t.get_id())
+        yield t
+        todo.extend(t.children())
+
+# equations F requires: those among its conjuncts and the conclusions of its implications
+def equations(F):
+    seen = set()
+    todo = [F]
+    while len(todo) > 0:
+        p = todo.pop()
+        if p.get_id() in seen:
+            continue
+        seen.add(p.get_id())
+        if z3.is_and(p):
+            todo.extend(p.children())
+        elif z3.is_implies(p):
+            todo.append(p.arg(1))
+        elif z3.is_eq(p):
+            yield p.arg(0), p.arg(1)
+
+def mentions(t, e):
+    return any(s.eq(e) for s in subterms(t))
+
+# a witness (e, t) for one of evars in F, or None
+def witness(F, evars):
+    for l, r in equations(F):
+        for e, t in [(l, r), (r, l)]:
+            if any(e.eq(v) for v in evars) and not mentions(t, e):
+                return e, t
+    return None
+
+# F with witnesses substituted for evars (z3 constants), or None if some have none
+def eliminate(F, evars):
+    evars = list(evars)
+    while len(evars) > 0:
+        w = witness(F, evars)
+        if w is None:
+            return None
+        F = z3.substitute(F, w)
+        evars = [v for v in evars if not v.eq(w[0])]
+    return F
+
+if __name__ == '__main__':
+    n, m, a, b = z3.Ints('n m a b')
+    # ∀ n m ∃ a b. a == n + 1 ∧ (m > 0 → b == a * m)
+    print(eliminate(z3.And(a == n + 1, z3.Implies(m > 0, b == a * m)), [a, b]))
+    # a only occurs under +, so there's no witness
+    print(eliminate(a + 1 == n, [a]))
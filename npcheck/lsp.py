@@ -0,0 +1,290 @@
+import sys
+import json
+import time
+import threading
+import ast as A
+import urllib.parse
+
+# language server for npcheck over stdio
+# publishes check failures as diagnostics and answers hovers with inferred types
+
+import npcheck as N
+import pattern as P
+import util as U
+from checker import Checker, Rule, IndexedRule, CheckError, ConfusionError
+
+# seconds to wait after the last edit before checking
+debounce = 0.3
+
+# raised inside a check whose document has been edited since it started
+class Cancelled(Exception):
+    pass
+
+# -------------------- positions --------------------
+
+# lsp positions count utf-16 code units; ast col_offsets count utf-8 bytes
+def to_lsp_col(line, col):
+    return len(line.encode()[:col].decode(errors='ignore').encode('utf-16-le')) // 2
+
+def from_lsp_col(line, character):
+    units = line.encode('utf-16-le')[:2 * character]
+    return len(units.decode('utf-16-le', errors='ignore').encode())
+
+# range covered by ast node a in source lines, as lsp line/character pairs
+def node_range(a, lines):
+    row, col = U.coords(a)
+    line = lines[row] if row < len(lines) else ''
+    end_row = getattr(a, 'end_lineno', None)
+    if end_row is not None and type(a) is not A.Module:
+        end_row -= 1
+        end_line = lines[end_row] if end_row < len(lines) else ''
+        end_col = to_lsp_col(end_line, a.end_col_offset)
+    else:
+        end_row, end_col = row, len(line.encode('utf-16-le')) // 2
+    return {
+        'start': {'line': row, 'character': to_lsp_col(line, col)},
+        'end': {'line': end_row, 'character': end_col}}
+
+# -------------------- documents --------------------
+
+class Document:
+    def __init__(self, uri, text, version):
+        self.uri = uri
+        self.text = text
+        self.version = version
+        self.edited = time.monotonic()
+        self.checked = None # (text that was checked, diagnostics)
+        # (row, start col, end col) -> inferred types, from the latest finished check
+        self.types = {}
+        # rule matches from earlier checks, kept while the imports stay the same
+        self.imports = None
+        self.ast_memo = {}
+        self.extended = {}
+        path = urllib.parse.unquote(urllib.parse.urlparse(uri).path)
+        self.rules = [self.watch(rule) for rule in N.rules_for(path)]
+
+    # wrap a rule so that it stops the check once the document has been edited,
+    # and records the types of identifiers for hovers
+    def watch(self, rule):
+        if type(rule) is IndexedRule:
+            compile = rule.compile
+            return IndexedRule(
+                rule.table, lambda name, entry: self.watch(compile(name, entry)), rule.name)
+        recorders = {
+            'ident': record_ident,
+            'attr_ident': record_ident,
+            'assign': record_assign,
+            'assign_anno': record_assign}
+        record = recorders.get(rule.name)
+
+        def action(checker, Γ, **kwargs):
+            if self.version != self.checking:
+                raise Cancelled()
+            results = rule.action(checker, Γ, **kwargs)
+            if record is not None:
+                for Γ1, a in results:
+                    for span, t in record(Γ1, a, **kwargs):
+                        self.recording.setdefault(span, set()).add(str(t))
+            return results
+
+        return Rule(rule.pattern, action, rule.name)
+
+    # check the current text; return False if an edit arrived before the check finished
+    def check(self):
+        text, self.checking = self.text, self.version
+        if self.checked is not None and self.checked[0] == text:
+            return True
+        self.recording = {}
+        try:
+            tree = A.parse(text)
+        except SyntaxError as e:
+            row = max((e.lineno or 1) - 1, 0)
+            col = max((e.offset or 1) - 1, 0)
+            self.checked = (text, [{
+                'range': {
+                    'start': {'line': row, 'character': col},
+                    'end': {'line': row, 'character': col + 1}},
+                'severity': 1,
+                'source': 'npcheck',
+                'message': 'Syntax error: ' + str(e.msg)}])
+            return True
+
+        imports = [P.simplify(a)
+            for a in tree.body if type(a) in (A.Import, A.ImportFrom)]
+        if imports != self.imports:
+            self.imports = imports
+            self.ast_memo = {}
+            self.extended = {}
+
+        lines = text.split('\n')
+        diagnostic = lambda a, message: {
+            'range': node_range(a, lines),
+            'severity': 1,
+            'source': 'npcheck',
+            'message': message}
+        try:
+            Checker(self.rules, adapt=self.watch,
+                _ast_memo=self.ast_memo, _memo={}, _extended=self.extended).check(tree)
+            diagnostics = []
+        except Cancelled:
+            return False
+        except (CheckError, ConfusionError) as e:
+            diagnostics = [diagnostic(a, message) for a, message in unique(e.diagnostics())]
+        except Exception as e:
+            diagnostics = [diagnostic(tree, str(e))]
+        if self.version != self.checking:
+            return False
+        self.checked = (text, diagnostics)
+        self.types = self.recording
+        return True
+
+    def hover(self, line, character):
+        lines = self.text.split('\n')
+        if line >= len(lines):
+            return None
+        col = from_lsp_col(lines[line], character)
+        spans = [(row, start, end)
+            for row, start, end in self.types
+            if row == line and start <= col < end]
+        if len(spans) == 0:
+            return None
+        # innermost span under the cursor
+        row, start, end = min(spans, key=lambda a: a[2] - a[1])
+        types = sorted(self.types[row, start, end])
+        return {
+            'contents': {'kind': 'plaintext', 'value': '\n'.join(types)},
+            'range': {
+                'start': {'line': row, 'character': to_lsp_col(lines[row], start)},
+                'end': {'line': row, 'character': to_lsp_col(lines[row], end)}}}
+
+def unique(pairs):
+    seen = set()
+    for a, message in pairs:
+        key = (U.coords(a), message)
+        if key not in seen:
+            seen.add(key)
+            yield a, message
+
+def span(a, name):
+    row, col = U.coords(a)
+    return (row, col, col + len(name.encode()))
+
+def record_ident(Γ, t, a):
+    name = U.ident2str(a)
+    return [(span(a, name), Γ.typeof(name))]
+
+def record_assign(Γ, _, lhs, rhs, anno=None):
+    name = U.ident2str(lhs)
+    return [(span(lhs, name), Γ.typeof(name))] if name in Γ else []
+
+# -------------------- server --------------------
+
+class Server:
+    def __init__(self, stdin, stdout):
+        self.stdin = stdin
+        self.stdout = stdout
+        self.documents = {}
+        self.lock = threading.Lock()
+        self.edits = threading.Condition(self.lock)
+        self.running = True
+
+    def send(self, message):
+        body = json.dumps(message).encode()
+        with self.lock:
+            self.stdout.write(b'Content-Length: %d\r\n\r\n' % len(body) + body)
+            self.stdout.flush()
+
+    def receive(self):
+        length = None
+        while True:
+            line = self.stdin.readline()
+            if not line:
+                return None
+            line = line.strip()
+            if line == b'':
+                break
+            k, v = line.split(b':', 1)
+            if k.strip().lower() == b'content-length':
+                length = int(v)
+        return json.loads(self.stdin.read(length).decode())
+
+    def publish(self, document):
+        self.send({
+            'jsonrpc': '2.0',
+            'method': 'textDocument/publishDiagnostics',
+            'params': {
+                'uri': document.uri,
+                'version': document.checking,
+                'diagnostics': document.checked[1]}})
+
+    # check documents once they have been quiet for debounce seconds
+    def worker(self):
+        while True:
+            with self.lock:
+                while self.running:
+                    now = time.monotonic()
+                    due = [d for d in self.documents.values()
+                        if d.checked is None or d.checked[0] != d.text]
+                    ready = [d for d in due if now - d.edited >= debounce]
+                    if len(ready) > 0:
+                        document = ready[0]
+                        break
+                    timeout = min((debounce - (now - d.edited) for d in due), default=None)
+                    self.edits.wait(timeout)
+                if not self.running:
+                    return
+            if document.check():
+                self.publish(document)
+
+    def edit(self, uri, text, version):
+        with self.lock:
+            if uri in self.documents:
+                document = self.documents[uri]
+                document.text = text
+                document.version = version
+                document.edited = time.monotonic()
+            else:
+                self.documents[uri] = Document(uri, text, version)
+            self.edits.notify()
+
+    def handle(self, message):
+        method = message.get('method')
+        params = message.get('params', {})
+        result = None
+        if method == 'initialize':
+            result = {'capabilities': {'textDocumentSync': 1, 'hoverProvider': True}}
+        elif method == 'textDocument/didOpen':
+            doc = params['textDocument']
+            self.edit(doc['uri'], doc['text'], doc.get('version'))
+        elif method == 'textDocument/didChange':
+            doc = params['textDocument']
+            # full sync: the last change holds the whole text
+            self.edit(doc['uri'], params['contentChanges'][-1]['text'], doc.get('version'))
+        elif method == 'textDocument/didClose':
+            with self.lock:
+                self.documents.pop(params['textDocument']['uri'], None)
+        elif method == 'textDocument/hover':
+            document = self.documents.get(params['textDocument']['uri'])
+            if document is not None:
+                position = params['position']
+                result = document.hover(position['line'], position['character'])
+        elif method == 'shutdown':
+            with self.lock:
+                self.running = False
+                self.edits.notify()
+        elif method == 'exit':
+            return False
+        if 'id' in message:
+            self.send({'jsonrpc': '2.0', 'id': message['id'], 'result': result})
+        return True
+
+    def serve(self):
+        thread = threading.Thread(target=self.worker, daemon=True)
+        thread.start()
+        while True:
+            message = self.receive()
+            if message is None or not self.handle(message):
+                break
+
+if __name__ == '__main__':
+    Server(sys.stdin.buffer, sys.stdout.buffer).serve()
@@ -5,23 +5,31 @@ import util as U
 import sys
 import ast as A
 import pattern as P
-
-if len(sys.argv) < 2:
-    print('Usage: python3 numpycheck.py <file to check>')
-    exit()
+import summary as S
+import profiler as R
+import queries as Q
+import tracing as X
+import budget as B
+import time
+import argparse
+import os
+import signatures
+import strategies
+import parallel
 
 def expect(t, t1):
     if type(t) is not type(t1):
-        raise UnificationError(t, t1)
+        raise UnificationError(t, t1, 'incompatible types')
 
+# shape is a tuple of dimensions of any length, or a single dimension
 @typerule(globals())
-def analyze_constructor(self, Γ, **kwargs):
-    avars = dict(zip(kwargs, map(AVar, map(EVar, U.fresh_ids))))
-    for k, e in shape, Γ <- kwargs.items():
+def analyze_constructor(self, Γ, shape):
+    dims = shape.elts if type(shape) is A.Tuple else [shape]
+    for e in new_shape, Γ <- dims:
         Γ, t <- self.analyze([Γ], e)
-        Γ.unify(t, avars[k])
+        Γ.unify(t, AVar(EVar(next(U.fresh_ids))))
         yield t
-    return [(Γ, Array(shape))]
+    return [(Γ, Array(new_shape))]
 
 @typerule(globals())
 def analyze_index(self, Γ, array, dims):
@@ -29,6 +37,8 @@ def analyze_index(self, Γ, array, dims):
     expect(array_type, Array([EVar('a')]))
     if len(dims) > len(array_type):
         raise ValueError('Too many indices for array')
+    if any(type(d) is Dims for d in array_type[: len(dims)]):
+        raise ValueError('Indexing into variadic dimensions not supported')
     new_shape = []
     for arr, dim in zip(array_type, dims):
         if type(dim) is A.Index:
@@ -49,7 +59,33 @@ def analyze_index(self, Γ, array, dims):
     new_shape += array_type[len(dims) :]
     return [(Γ, Array(new_shape))]
 
+# broadcast shapes of integer dimensions; raises ValueError if they don't broadcast
+# numpy is imported here, not at the top, so files that never broadcast don't load it
+def broadcast_shapes(lhs, rhs):
+    import numpy
+    if hasattr(numpy, 'broadcast_shapes'):
+        return numpy.broadcast_shapes(lhs, rhs)
+    # numpy < 1.20
+    return numpy.broadcast(numpy.empty(lhs, dtype=[]), numpy.empty(rhs, dtype=[])).shape
+
+# whether t is an array whose dimensions are all literals
+concrete = lambda t: type(t) is Array and all(type(d) is ALit for d in t.shape)
+
 def check_broadcastable(Γ, lhs_type, rhs_type):
+    # concrete shapes broadcast as they would in numpy, without substituting into them
+    # or building z3 terms
+    if concrete(lhs_type) and concrete(rhs_type):
+        lhs = tuple(d.value for d in lhs_type.shape)
+        rhs = tuple(d.value for d in rhs_type.shape)
+        try:
+            shape = broadcast_shapes(lhs, rhs)
+        except ValueError:
+            raise UnificationError(lhs_type, rhs_type, 'unbroadcastable dimensions')
+        return [(Γ,
+            lhs_type if shape == lhs else
+            rhs_type if shape == rhs else
+            Array([ALit(d) for d in shape]))]
+
     lhs_type = lhs_type.under(Γ)
     rhs_type = rhs_type.under(Γ)
     if isinstance(lhs_type, AExp) and type(rhs_type) is Array:
@@ -66,8 +102,13 @@ def check_broadcastable(Γ, lhs_type, rhs_type):
     # https://docs.scipy.org/doc/numpy-1.15.0/user/basics.broadcasting.html
     # - check dimensions in reverse order
     # - for each pair (a, b), need a = b \/ a = 1 \/ b = 1
+    # - a variadic segment (*batch) stops the walk: the dimensions left on both sides
+    #   must then be equal
     shape = []
-    for l, r in zip(reversed(lhs_type), reversed(rhs_type)):
+    lhs_dims, rhs_dims = list(lhs_type), list(rhs_type)
+    while len(lhs_dims) > 0 and len(rhs_dims) > 0 and \
+          Dims not in (type(lhs_dims[-1]), type(rhs_dims[-1])):
+        l, r = lhs_dims.pop(), rhs_dims.pop()
         # to avoid building up unnecessary z3 queries, only broadcast if 'obvious'
         eq_lr = l.to_z3() == r.to_z3()
         eq_l1 = l.to_z3() == 1
@@ -82,8 +123,9 @@ def check_broadcastable(Γ, lhs_type, rhs_type):
             Γ.unify(l, r)
             shape.append(l)
 
-    longer_type = max([lhs_type, rhs_type], key=len)
-    leftover_dims = longer_type[: -min(len(lhs_type), len(rhs_type))]
+    if len(lhs_dims) > 0 and len(rhs_dims) > 0:
+        Γ.unify(Array(lhs_dims), Array(rhs_dims))
+    leftover_dims = lhs_dims if len(lhs_dims) > 0 else rhs_dims
     shape = leftover_dims + shape[::-1]
     return [(Γ, Array(shape))]
 
@@ -93,24 +135,41 @@ def analyze_binary_op(self, Γ, lhs, rhs):
     Γ, rhs_type <- self.analyze([Γ], rhs)
     return check_broadcastable(Γ, lhs_type, rhs_type)
 
-# generate rules for numpy operations on all <=depth-dimensional arrays
-def numpy_rules(alias, depth=4):
-
-    # generate rules for array constructors np.zeros, np.ones, etc
-    def constructor(name):
-        arg = '_a' + next(U.fresh_ids)
-        rules = [Rule(f'{alias}.{name}({arg})', analyze_constructor, f'{name}_base')]
-        args = [arg]
-        for i in range(1, depth + 1):
-            rules.append(Rule(
-                f'{alias}.{name}(({" ".join(a + "," for a in args)}))',
-                analyze_constructor,
-                f'{name}({", ".join(args)})'))
-            args.append('_a' + next(U.fresh_ids))
-        return rules
+# np.reshape(a, (d1, .., dk)) and a.reshape(d1, .., dk) or a.reshape((d1, .., dk))
+# shape is the tuple node, or the list of arguments of the method
+@typerule(globals())
+def analyze_reshape(self, Γ, a, shape):
+    if type(shape) is list and len(shape) == 1:
+        shape = shape[0]
+    dims = shape if type(shape) is list else shape.elts if type(shape) is A.Tuple else [shape]
+    Γ, array_type <- self.analyze([Γ], a)
+    expect(array_type, Array([EVar('a')]))
+    array_type = array_type.under(Γ)
+    if any(type(d) is Dims for d in array_type):
+        raise ValueError('Reshaping variadic dimensions not supported')
+    for e in new_shape, Γ <- dims:
+        Γ, t <- self.analyze([Γ], e)
+        Γ.unify(t, AVar(EVar(next(U.fresh_ids))))
+        yield t
+    # the number of elements stays the same
+    size = lambda shape: U.reduce(lambda a, b: a * b, shape) if len(shape) > 0 else ALit(1)
+    Γ.unify(size(array_type), size(new_shape))
+    return [(Γ, Array(new_shape))]
+
+# generate rules for numpy operations on arrays imported as alias
+def numpy_rules(alias):
 
+    # rules for the functions in signatures.table, compiled as they are used
+    actions = {'broadcast': analyze_binary_op, 'reshape': analyze_reshape}
+    def signature(name, entry):
+        pattern = entry[0].format(np=alias)
+        if len(entry) == 2:
+            return Rule(pattern, actions[entry[1]], name)
+        return expression(pattern, entry[1], entry[2], name)
+
+    # generate rules for array constructors np.zeros, np.ones, etc, of any rank
     def constructors(*names):
-        return [rule for name in names for rule in constructor(name)]
+        return [Rule(f'{alias}.{name}(_shape)', analyze_constructor, name) for name in names]
 
     # generate rules for binary operators on arrays with broadcastable dimensions
     def binary_ops(*ops):
@@ -124,6 +183,8 @@ def numpy_rules(alias, depth=4):
         Γ, array_type <- self.analyze([Γ], array)
         expect(array_type, Array([EVar('a')]))
         index = index.n
+        if any(type(d) is Dims for d in array_type[: index + 1]):
+            raise ValueError(f'dimension {index} of {array_type} is variadic')
         if index < len(array_type):
             return [(Γ, array_type[index])]
         else:
@@ -134,10 +195,27 @@ def numpy_rules(alias, depth=4):
         # 'eye', 'diag', 'empty', 'random.rand', 'random.randn') +
         binary_ops('+', '*', '-', '/', '**', '//') +
         [Rule('_array.shape[index__Num]', analyze_shape_i)] +
-        [Rule('_array[__dims]', analyze_index)])
+        [Rule('_array[__dims]', analyze_index)] +
+        [IndexedRule(signatures.table, signature, 'signatures')])
+
+# numpy rules for each alias, generated once
+numpy_rule_sets = {}
 
 def analyze_import_numpy(self, Γ, np):
-    self.rules = numpy_rules(np, depth=4) + self.rules
+    if np not in numpy_rule_sets:
+        numpy_rule_sets[np] = numpy_rules(np)
+    k = (id(self.rules), 'numpy as ' + np)
+    if k not in self._extended:
+        rules = numpy_rule_sets[np]
+        if rules[0] in self.rules:
+            extended = self.rules
+        else:
+            added = rules if self.adapt is None else [self.adapt(rule) for rule in rules]
+            extended = added + self.rules
+        self._extended[k] = (self.rules, extended)
+        # importing again, e.g. in another branch, adds nothing
+        self._extended[(id(extended), k[1])] = (extended, extended)
+    self.rules = self._extended[k][1]
     #for rule in self.rules:
     #    print(rule)
     return [(Γ, None)]
@@ -152,20 +230,120 @@ rules = basic_rules + [
         lambda self, Γ: [(Γ, None)],
         'nptyping')]
 
-try:
-    s = open(sys.argv[1]).read()
-except FileNotFoundError:
-    print(f'{sys.argv[1]}: No such file or directory')
-    exit()
-
-c = Checker(rules)
-try:
-    state = c.check(A.parse(s))
-    #print(state)
-    print('OK')
-except (CheckError, ConfusionError) as e:
-    print(e.pretty(s))
-except Exception as e:
-    print(e)
-
-#c.dump_memo(s)
+# rule lists for each directory checked, kept so that imports extend them only once
+directory_rules = {}
+
+# rules for checking the file at path, which may import modules next to it
+def rules_for(path):
+    directory = os.path.dirname(os.path.abspath(path))
+    if directory not in directory_rules:
+        directory_rules[directory] = rules + S.import_rules([directory], summarize)
+    return directory_rules[directory]
+
+# check the module at path for its summary
+def summarize(path):
+    s = open(path).read()
+    tree = A.parse(s)
+    try:
+        state = Checker(rules_for(path), _ast_memo={}, _memo={}).check(tree)
+    except (CheckError, ConfusionError) as e:
+        raise ValueError(f'In {path}:\n{e.pretty(s)}')
+    except (ValueError, UnificationError) as e:
+        raise ValueError(f'In {path}:\n{e}')
+    return s, tree, S.function_types(state, tree)
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='npck', description='Check array shapes in a python file.')
+    parser.add_argument('file', help='file to check')
+    parser.add_argument('--emit-summary', action='store_true',
+        help=f'write the types of the top-level functions to {S.summary_dir}/ for importers')
+    parser.add_argument('--profile-rules', action='store_true',
+        help='report per-rule match counts and timings after checking')
+    parser.add_argument('--log-queries', action='store_true',
+        help='report the z3 queries made, slowest first, and the time spent in the solver')
+    parser.add_argument('--dump-queries', metavar='DIR',
+        help='write the z3 queries taking at least --slow-query seconds to DIR as .smt2 files')
+    parser.add_argument('--slow-query', metavar='SECONDS', type=float, default=1.0,
+        help='threshold for --dump-queries (default 1.0)')
+    parser.add_argument('--trace', metavar='FILE',
+        help='write a timeline of the check to FILE (rule actions, context copies, unify, z3)')
+    parser.add_argument('--trace-format', choices=['chrome', 'collapsed'], default='chrome',
+        help='chrome trace-event json (default), or collapsed stacks for flamegraph.pl')
+    parser.add_argument('--no-slicing', action='store_true',
+        help='send each constraint to z3 whole instead of as independent components')
+    parser.add_argument('--no-elimination', action='store_true',
+        help='always send z3 quantified queries, without first solving existentials by equations')
+    parser.add_argument('--query-timeout', metavar='SECONDS', type=float, default=10.,
+        help='give up on a z3 query after SECONDS (default 10, 0 for no limit)')
+    parser.add_argument('--solver-budget', metavar='SECONDS', type=float, default=60.,
+        help='stop making z3 queries after SECONDS in the solver in total (default 60, 0 for no limit)')
+    parser.add_argument('--jobs', '-j', metavar='N', type=int, default=1,
+        help='verify independent parts of a constraint in N worker processes (default 1)')
+    parser.add_argument('--strategy', choices=[*strategies.solvers, 'portfolio'], default='tactics',
+        help='how to make z3 solvers: a tactic chain for shape constraints (default), z3\'s '
+             'default solver, quantifier elimination, or all three taking turns with doubling '
+             'time slices (as fast as tactics on queries it settles in 50ms, and up to about '
+             'ten times what the fastest strategy needs on the rest)')
+    return parser.parse_args(argv)
+
+# check the file named by args and return the report that npck prints
+def run(args, checker=None):
+    try:
+        s = open(args.file).read()
+    except FileNotFoundError:
+        return f'{args.file}: No such file or directory'
+
+    c = Checker(rules_for(args.file)) if checker is None else checker
+    if args.profile_rules:
+        c.profiler = R.RuleProfiler()
+    if args.log_queries or args.dump_queries is not None:
+        U.query_log = Q.QueryLog(args.slow_query, args.dump_queries)
+    if args.trace is not None:
+        X.Tracer().install()
+    U.slice_queries = not args.no_slicing
+    U.eliminate_evars = not args.no_elimination
+    U.budget = B.Budget(args.query_timeout or None, args.solver_budget or None)
+    U.jobs = args.jobs
+    U.strategy = args.strategy
+    U.workers = parallel.Workers()
+    start = time.perf_counter()
+
+    def report(result):
+        if c.profiler is not None:
+            result += '\n\n' + c.profiler.report()
+        if args.log_queries:
+            result += '\n\n' + U.query_log.report(total=time.perf_counter() - start)
+        if len(U.budget.undecided) > 0 or U.budget.exhausted():
+            result += '\n\n' + U.budget.report()
+        if args.trace is not None:
+            if args.trace_format == 'chrome':
+                U.tracer.write_chrome(args.trace)
+            else:
+                U.tracer.write_collapsed(args.trace)
+        return result
+
+    try:
+        tree = A.parse(s)
+        state = c.check(tree)
+        #print(state)
+        if args.emit_summary:
+            S.write(args.file, s, tree, S.function_types(state, tree))
+        return report('OK')
+    except (CheckError, ConfusionError) as e:
+        return report(e.pretty(s))
+    except Exception as e:
+        return report(str(e))
+    finally:
+        U.query_log = None
+        if U.tracer is not None:
+            U.tracer.uninstall()
+        U.slice_queries = True
+        U.eliminate_evars = True
+        U.budget = None
+        U.jobs = 1
+        U.strategy = 'tactics'
+        U.workers.close()
+        U.workers = None
+
+if __name__ == '__main__':
+    print(run(parse_args(sys.argv[1:])))
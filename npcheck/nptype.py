@@ -3,8 +3,48 @@ import pattern as P
 import ast as A
 import substitution as S
 import z3
+import functools
+
+# z3 terms built by the to_z3 of arithmetic and boolean expressions, by expression, so
+# that converting the same subterm again is a lookup. Checker.check empties it before and
+# after each check, which lets z3 free the terms of checks that are done; it is also
+# emptied when it reaches max_z3_terms. TNone isn't cached: each of its to_z3 is fresh
+z3_terms = {}
+max_z3_terms = 1 << 16
+
+def cached_z3(to_z3):
+    @functools.wraps(to_z3)
+    def f(self):
+        try:
+            return z3_terms[self]
+        except KeyError:
+            pass
+        t = to_z3(self)
+        if len(z3_terms) >= max_z3_terms:
+            z3_terms.clear()
+        z3_terms[self] = t
+        return t
+    return f
+
+# cache the set method f computes on a compound term, as a frozenset in a slot of the
+# term itself (terms are immutable). variables aren't cached, their sets hold the variable
+def cached_set(f):
+    attr = '_' + f.__name__
+    @functools.wraps(f)
+    def g(self):
+        s = getattr(self, attr, None)
+        if s is None:
+            s = f(self)
+            if type(s) is not frozenset:
+                s = frozenset(s)
+            setattr(self, attr, s)
+        return s
+    return g
+
+no_vars = frozenset()
 
 class Type:
+    __slots__ = ('_uvars', '_evars', '_names') # see cached_set
     def __str__(self):
         pass
     def __eq__(self, other):
@@ -17,6 +57,7 @@ class Type:
         pass
     def vars(self):
         return self.uvars() | self.evars()
+    @cached_set
     def names(self):
         return {v.name if type(v) in (UVar, EVar) else v.var.name for v in self.vars()}
     def renamed(self, renamings):
@@ -43,11 +84,13 @@ class Type:
     def __lshift__(a, b):
         is_e = lambda v, t: type(v) is t and type(v.var) is EVar
         return (type(a) is not EVar and type(b) is EVar or
-                type(a) is type(b) is EVar and a.name <= b.name or
+                type(a) is type(b) is EVar and U.name_order(a.name) <= U.name_order(b.name) or
                 not is_e(a, AVar) and isinstance(a, AExp) and is_e(b, AVar) or
                 not is_e(a, BVar) and isinstance(a, BExp) and is_e(b, BVar) or
-                is_e(a, AVar) and is_e(b, AVar) and a.var.name <= b.var.name or
-                is_e(a, BVar) and is_e(b, BVar) and a.var.name <= b.var.name)
+                is_e(a, AVar) and is_e(b, AVar) and U.name_order(a.var.name) <= U.name_order(b.var.name) or
+                is_e(a, BVar) and is_e(b, BVar) and U.name_order(a.var.name) <= U.name_order(b.var.name) or
+                not is_e(a, Dims) and type(a) in (Tuple, Dims) and is_e(b, Dims) or
+                is_e(a, Dims) and is_e(b, Dims) and U.name_order(a.var.name) <= U.name_order(b.var.name))
 
     # for arithmetic expressions
     def __add__(self, other):
@@ -96,22 +139,19 @@ class Type:
 
 # universal (rigid) type variable
 class UVar(Type):
+    __slots__ = ('name',)
     def __init__(self, name):
         self.name = name
     def __str__(self):
-        try:
-            int(self.name)
-        except ValueError:
-            return str(self.name)
-        return 'tmp' + self.name
+        return U.display_name(self.name)
     def __eq__(self, other):
         return type(self) is type(other) and self.name == other.name
     def __hash__(self):
         return hash(('UVar', self.name))
     def uvars(self):
-        return {self}
+        return frozenset((self,))
     def evars(self):
-        return set()
+        return no_vars
     def renamed(self, renamings):
         return UVar(renamings[self.name]) if self.name in renamings else UVar(self.name)
     def under(self, σ):
@@ -120,9 +160,9 @@ class UVar(Type):
     def replaced(self, replacements):
         return replacements[self] if self in replacements else self
     def to_z3(self, context=type):
-        return z3.Int(self.name) if context == int else \
-               z3.Bool(self.name) if context == bool else \
-               z3.Int(self.name) # shrug
+        return z3.Int(U.z3_name(self.name)) if context == int else \
+               z3.Bool(U.z3_name(self.name)) if context == bool else \
+               z3.Int(U.z3_name(self.name)) # shrug
     def eapp(self, blacklist=[]):
         return EVar(self.name) if self.name not in blacklist else UVar(self.name)
     def flipped(self, blacklist=[]):
@@ -132,22 +172,19 @@ class UVar(Type):
 
 # existential (ambiguous) type variable
 class EVar(Type):
+    __slots__ = ('name',)
     def __init__(self, name):
         self.name = name
     def __str__(self):
-        try:
-            int(self.name)
-        except ValueError:
-            return '?' + str(self.name)
-        return '?tmp' + self.name
+        return '?' + U.display_name(self.name)
     def __eq__(self, other):
         return type(self) is type(other) and self.name == other.name
     def __hash__(self):
         return hash(('EVar', self.name))
     def uvars(self):
-        return set()
+        return no_vars
     def evars(self):
-        return {self}
+        return frozenset((self,))
     def renamed(self, renamings):
         return EVar(renamings[self.name]) if self.name in renamings else EVar(self.name)
     def under(self, σ):
@@ -156,9 +193,9 @@ class EVar(Type):
     def replaced(self, replacements):
         return replacements[self] if self in replacements else self
     def to_z3(self, context=type):
-        return z3.Int(self.name) if context == int else \
-               z3.Bool(self.name) if context == bool else \
-               z3.Int(self.name) # shrug
+        return z3.Int(U.z3_name(self.name)) if context == int else \
+               z3.Bool(U.z3_name(self.name)) if context == bool else \
+               z3.Int(U.z3_name(self.name)) # shrug
     def eapp(self, blacklist=[]):
         return EVar(self.name)
     def flipped(self, blacklist=[]):
@@ -169,6 +206,7 @@ class EVar(Type):
 # -------------------- none --------------------
 
 class TNone(Type):
+    __slots__ = ()
     def __init__(self):
         pass
     def __str__(self):
@@ -178,9 +216,9 @@ class TNone(Type):
     def __hash__(self):
         return hash('TNone')
     def uvars(self):
-        return set()
+        return no_vars
     def evars(self):
-        return set()
+        return no_vars
     def renamed(self, renamings):
         return self
     def under(self, σ):
@@ -188,7 +226,7 @@ class TNone(Type):
     def replaced(self, replacements):
         return self
     def to_z3(self, context=type):
-        return z3.Int(next(U.fresh_ids)) # TODO: replace with something reasonable
+        return z3.Int(U.z3_name(next(U.fresh_ids))) # TODO: replace with something reasonable
     def eapp(self, blacklist=[]):
         return self
     def flipped(self, blacklist=[]):
@@ -199,10 +237,12 @@ class TNone(Type):
 # -------------------- arithmetic expressions --------------------
 
 class AExp(Type):
+    __slots__ = ()
     def to_z3(self):
         pass
 
 class ALit(AExp):
+    __slots__ = ('value',)
     def __init__(self, n):
         self.value = n
     def __str__(self):
@@ -212,9 +252,9 @@ class ALit(AExp):
     def __hash__(self):
         return hash(('ALit', self.value))
     def uvars(self):
-        return set()
+        return no_vars
     def evars(self):
-        return set()
+        return no_vars
     def renamed(self, renamings):
         return self
     def under(self, σ):
@@ -231,6 +271,7 @@ class ALit(AExp):
         return self
 
 class AVar(AExp):
+    __slots__ = ('var',)
     def __init__(self, var):
         self.var = var
     def __str__(self):
@@ -240,15 +281,16 @@ class AVar(AExp):
     def __hash__(self):
         return hash(('AVar', self.var))
     def uvars(self):
-        return {self} if type(self.var) is UVar else set()
+        return frozenset((self,)) if type(self.var) is UVar else no_vars
     def evars(self):
-        return {self} if type(self.var) is EVar else set()
+        return frozenset((self,)) if type(self.var) is EVar else no_vars
     def renamed(self, renamings):
         return AVar(self.var.renamed(renamings))
     def under(self, σ):
         return σ.find(self)
     def replaced(self, replacements):
         return AVar(self.var.replaced(replacements))
+    @cached_z3
     def to_z3(self):
         return self.var.to_z3(context=int)
     def eapp(self, blacklist=[]):
@@ -259,6 +301,7 @@ class AVar(AExp):
         return AVar(self.var.gen(blacklist))
 
 class Add(AExp):
+    __slots__ = ('a', 'b')
     def __init__(self, a, b):
         self.a = a
         self.b = b
@@ -268,8 +311,10 @@ class Add(AExp):
         return type(self) is type(other) and self.a == other.a and self.b == other.b
     def __hash__(self):
         return hash(('Add', self.a, self.b))
+    @cached_set
     def uvars(self):
         return self.a.uvars() | self.b.uvars()
+    @cached_set
     def evars(self):
         return self.a.evars() | self.b.evars()
     def renamed(self, renamings):
@@ -278,6 +323,7 @@ class Add(AExp):
         return Add(self.a.under(σ), self.b.under(σ))
     def replaced(self, replacements):
         return Add(self.a.replaced(replacements), self.b.replaced(replacements))
+    @cached_z3
     def to_z3(self):
         return self.a.to_z3() + self.b.to_z3()
     def eapp(self, blacklist=[]):
@@ -288,6 +334,7 @@ class Add(AExp):
         return Add(self.a.gen(blacklist), self.b.gen(blacklist))
 
 class Mul(AExp):
+    __slots__ = ('a', 'b')
     def __init__(self, a, b):
         self.a = a
         self.b = b
@@ -297,8 +344,10 @@ class Mul(AExp):
         return type(self) is type(other) and self.a == other.a and self.b == other.b
     def __hash__(self):
         return hash(('Mul', self.a, self.b))
+    @cached_set
     def uvars(self):
         return self.a.uvars() | self.b.uvars()
+    @cached_set
     def evars(self):
         return self.a.evars() | self.b.evars()
     def renamed(self, renamings):
@@ -307,6 +356,7 @@ class Mul(AExp):
         return Mul(self.a.under(σ), self.b.under(σ))
     def replaced(self, replacements):
         return Mul(self.a.replaced(replacements), self.b.replaced(replacements))
+    @cached_z3
     def to_z3(self):
         return self.a.to_z3() * self.b.to_z3()
     def eapp(self, blacklist=[]):
@@ -319,10 +369,12 @@ class Mul(AExp):
 # -------------------- boolean expressions --------------------
 
 class BExp(Type):
+    __slots__ = ()
     def to_z3(self):
         pass
 
 class BLit(BExp):
+    __slots__ = ('value',)
     def __init__(self, p):
         self.value = p
     def __str__(self):
@@ -332,9 +384,9 @@ class BLit(BExp):
     def __hash__(self):
         return hash(('BLit', self.value))
     def uvars(self):
-        return set()
+        return no_vars
     def evars(self):
-        return set()
+        return no_vars
     def renamed(self, renamings):
         return self
     def under(self, σ):
@@ -351,6 +403,7 @@ class BLit(BExp):
         return self
 
 class BVar(BExp):
+    __slots__ = ('var',)
     def __init__(self, var):
         self.var = var
     def __str__(self):
@@ -360,15 +413,16 @@ class BVar(BExp):
     def __hash__(self):
         return hash(('BVar', self.var))
     def uvars(self):
-        return {self} if type(self.var) is UVar else set()
+        return frozenset((self,)) if type(self.var) is UVar else no_vars
     def evars(self):
-        return {self} if type(self.var) is EVar else set()
+        return frozenset((self,)) if type(self.var) is EVar else no_vars
     def renamed(self, renamings):
         return BVar(self.var.renamed(renamings))
     def under(self, σ):
         return σ.find(self)
     def replaced(self, replacements):
         return BVar(self.var.replaced(replacements))
+    @cached_z3
     def to_z3(self):
         return self.var.to_z3(context=bool)
     def eapp(self, blacklist=[]):
@@ -379,6 +433,7 @@ class BVar(BExp):
         return BVar(self.var.gen(blacklist))
 
 class Or(BExp):
+    __slots__ = ('a', 'b')
     def __init__(self, a, b):
         self.a = a
         self.b = b
@@ -388,8 +443,10 @@ class Or(BExp):
         return type(self) is type(other) and self.a == other.a and self.b == other.b
     def __hash__(self):
         return hash(('Or', self.a, self.b))
+    @cached_set
     def uvars(self):
         return self.a.uvars() | self.b.uvars()
+    @cached_set
     def evars(self):
         return self.a.evars() | self.b.evars()
     def renamed(self, renamings):
@@ -398,6 +455,7 @@ class Or(BExp):
         return Or(self.a.under(σ), self.b.under(σ))
     def replaced(self, replacements):
         return Or(self.a.replaced(replacements), self.b.replaced(replacements))
+    @cached_z3
     def to_z3(self):
         return z3.Or(self.a.to_z3(), self.b.to_z3())
     def eapp(self, blacklist=[]):
@@ -408,6 +466,7 @@ class Or(BExp):
         return Or(self.a.gen(blacklist), self.b.gen(blacklist))
 
 class And(BExp):
+    __slots__ = ('a', 'b')
     def __init__(self, a, b):
         self.a = a
         self.b = b
@@ -417,8 +476,10 @@ class And(BExp):
         return type(self) is type(other) and self.a == other.a and self.b == other.b
     def __hash__(self):
         return hash(('And', self.a, self.b))
+    @cached_set
     def uvars(self):
         return self.a.uvars() | self.b.uvars()
+    @cached_set
     def evars(self):
         return self.a.evars() | self.b.evars()
     def renamed(self, renamings):
@@ -427,6 +488,7 @@ class And(BExp):
         return And(self.a.under(σ), self.b.under(σ))
     def replaced(self, replacements):
         return And(self.a.replaced(replacements), self.b.replaced(replacements))
+    @cached_z3
     def to_z3(self):
         return z3.And(self.a.to_z3(), self.b.to_z3())
     def eapp(self, blacklist=[]):
@@ -436,7 +498,60 @@ class And(BExp):
     def gen(self, blacklist=[]):
         return And(self.a.gen(blacklist), self.b.gen(blacklist))
 
+# conjunction of any number of terms, as Context keeps its assumptions and requirements:
+# flat, without duplicates and without True (see conj)
+class Conj(BExp):
+    __slots__ = ('terms',)
+    def __init__(self, terms):
+        self.terms = tuple(terms)
+    def __str__(self):
+        return '({})'.format(' ∧ '.join(map(str, self.terms))) if len(self.terms) > 0 else 'True'
+    def __eq__(self, other):
+        return type(self) is type(other) and self.terms == other.terms
+    def __hash__(self):
+        return hash(('Conj', self.terms))
+    @cached_set
+    def uvars(self):
+        return no_vars.union(*(a.uvars() for a in self.terms))
+    @cached_set
+    def evars(self):
+        return no_vars.union(*(a.evars() for a in self.terms))
+    def renamed(self, renamings):
+        return conj(a.renamed(renamings) for a in self.terms)
+    def under(self, σ):
+        return conj(a.under(σ) for a in self.terms)
+    def replaced(self, replacements):
+        return conj(a.replaced(replacements) for a in self.terms)
+    @cached_z3
+    def to_z3(self):
+        return (
+            True if len(self.terms) == 0 else
+            self.terms[0].to_z3() if len(self.terms) == 1 else
+            z3.And([a.to_z3() for a in self.terms]))
+    def eapp(self, blacklist=[]):
+        return conj(a.eapp(blacklist) for a in self.terms)
+    def flipped(self, blacklist=[]):
+        return conj(a.flipped(blacklist) for a in self.terms)
+    def gen(self, blacklist=[]):
+        return conj(a.gen(blacklist) for a in self.terms)
+
+# terms of the conjunction p, without True
+def conjuncts(p):
+    if type(p) is And:
+        return conjuncts(p.a) + conjuncts(p.b)
+    if type(p) is Conj:
+        return list(p.terms)
+    if type(p) is BLit and p.value is True:
+        return []
+    return [p]
+
+# the conjuncts of ps, in order, each once
+ordered_conjuncts = lambda ps: dict.fromkeys(q for p in ps for q in conjuncts(p))
+
+conj = lambda ps: Conj(ordered_conjuncts(ps))
+
 class Not(BExp):
+    __slots__ = ('a',)
     def __init__(self, a):
         self.a = a
     def __str__(self):
@@ -445,8 +560,10 @@ class Not(BExp):
         return type(self) is type(other) and self.a == other.a
     def __hash__(self):
         return hash(('Not', self.a))
+    @cached_set
     def uvars(self):
         return self.a.uvars()
+    @cached_set
     def evars(self):
         return self.a.evars()
     def renamed(self, renamings):
@@ -455,6 +572,7 @@ class Not(BExp):
         return Not(self.a.under(σ))
     def replaced(self, replacements):
         return Not(self.a.replaced(replacements))
+    @cached_z3
     def to_z3(self):
         return z3.Not(self.a.to_z3())
     def eapp(self, blacklist=[]):
@@ -465,6 +583,7 @@ class Not(BExp):
         return Not(self.a.gen(blacklist))
 
 class Predicate(BExp):
+    __slots__ = ('operator', 'z3ifier', 'a', 'b')
     def __init__(self, operator, z3ifier, a, b):
         self.operator = operator
         self.z3ifier = z3ifier
@@ -478,8 +597,10 @@ class Predicate(BExp):
             and (self.a, self.b, self.operator) == (other.a, other.b, other.operator))
     def __hash__(self):
         return hash((self.operator, self.a, self.b))
+    @cached_set
     def uvars(self):
         return self.a.uvars() | self.b.uvars()
+    @cached_set
     def evars(self):
         return self.a.evars() | self.b.evars()
     def renamed(self, renamings):
@@ -500,6 +621,7 @@ class Predicate(BExp):
             self.z3ifier,
             self.a.replaced(replacements),
             self.b.replaced(replacements))
+    @cached_z3
     def to_z3(self):
         return self.z3ifier(self.a.to_z3(), self.b.to_z3())
     def eapp(self, blacklist=[]):
@@ -531,6 +653,7 @@ Ge = lambda a, b: Predicate('>=', lambda c, d: c >= d, a, b)
 
 # tuple
 class Tuple(Type):
+    __slots__ = ('items',)
     def __init__(self, items):
         self.items = [Type.lift(a) for a in items]
     def __str__(self):
@@ -545,10 +668,12 @@ class Tuple(Type):
         return (a for a in self.items)
     def __hash__(self):
         return hash(('Tuple', tuple(self.items)))
+    @cached_set
     def uvars(self):
-        return U.mapreduce(U.union, U.uvars, self.items, set())
+        return U.mapreduce(U.union, U.uvars, self.items, no_vars)
+    @cached_set
     def evars(self):
-        return U.mapreduce(U.union, U.evars, self.items, set())
+        return U.mapreduce(U.union, U.evars, self.items, no_vars)
     def renamed(self, renamings):
         return Tuple(a.renamed(renamings) for a in self.items)
     def under(self, σ):
@@ -562,8 +687,43 @@ class Tuple(Type):
     def gen(self, blacklist=[]):
         return Tuple(a.gen(blacklist) for a in self.items)
 
+# variadic segment of an array shape, e.g. the *batch in array[*batch, n]
+# stands for any number of dimensions, and is bound to the Tuple of them by unification
+class Dims(Type):
+    __slots__ = ('var',)
+    def __init__(self, var):
+        self.var = var
+    def __str__(self):
+        return '*{}'.format(self.var)
+    def __eq__(self, other):
+        return type(self) is type(other) and self.var == other.var
+    def __hash__(self):
+        return hash(('Dims', self.var))
+    def uvars(self):
+        return frozenset((self,)) if type(self.var) is UVar else no_vars
+    def evars(self):
+        return frozenset((self,)) if type(self.var) is EVar else no_vars
+    def renamed(self, renamings):
+        return Dims(self.var.renamed(renamings))
+    def under(self, σ):
+        a = σ.find(self)
+        return a if a == self else a.under(σ)
+    def replaced(self, replacements):
+        return Dims(self.var.replaced(replacements))
+    def eapp(self, blacklist=[]):
+        return Dims(self.var.eapp(blacklist))
+    def flipped(self, blacklist=[]):
+        return Dims(self.var.flipped(blacklist))
+    def gen(self, blacklist=[]):
+        return Dims(self.var.gen(blacklist))
+
+# inline the dimensions bound to the variadic segments of a shape
+def splice(shape):
+    return [b for a in shape for b in (a.items if type(a) is Tuple else [a])]
+
 # numpy array
 class Array(Type):
+    __slots__ = ('shape',)
     def __init__(self, shape):
         self.shape = [Type.lift(a) for a in shape]
     def __str__(self):
@@ -580,14 +740,16 @@ class Array(Type):
         return self.shape[a]
     def __hash__(self):
         return hash(('Array', tuple(self.shape)))
+    @cached_set
     def uvars(self):
-        return U.mapreduce(U.union, U.uvars, self.shape, set())
+        return U.mapreduce(U.union, U.uvars, self.shape, no_vars)
+    @cached_set
     def evars(self):
-        return U.mapreduce(U.union, U.evars, self.shape, set())
+        return U.mapreduce(U.union, U.evars, self.shape, no_vars)
     def renamed(self, renamings):
         return Array(a.renamed(renamings) for a in self.shape)
     def under(self, σ):
-        return Array(a.under(σ) for a in self.shape)
+        return Array(splice(a.under(σ) for a in self.shape))
     def replaced(self, replacements):
         return Array(a.replaced(replacements) for a in self.shape)
     def eapp(self, blacklist=[]):
@@ -599,6 +761,7 @@ class Array(Type):
 
 # function
 class Fun(Type):
+    __slots__ = ('a', 'b')
     def __init__(self, a, b):
         self.a = a
         self.b = b
@@ -608,8 +771,10 @@ class Fun(Type):
         return type(self) is type(other) and self.a == other.a and self.b == other.b
     def __hash__(self):
         return hash(('Fun', self.a, self.b))
+    @cached_set
     def uvars(self):
         return self.a.uvars() | self.b.uvars()
+    @cached_set
     def evars(self):
         return self.a.evars() | self.b.evars()
     def renamed(self, renamings):
@@ -689,7 +854,10 @@ def unify(a, b, σ):
     elif type(a) is Fun:
         return unify(a.a, b.a, unify(a.b, b.b, σ))
 
-    elif type(a) in (Tuple, Array):
+    elif type(a) is Array:
+        return unify_shapes(a, b, σ)
+
+    elif type(a) is Tuple:
         if len(a) != len(b):
             raise UnificationError(a, b, 'unequal lengths')
         for l, r in zip(a, b):
@@ -698,6 +866,55 @@ def unify(a, b, σ):
 
     return σ
 
+# unify the shapes of arrays a and b, each of which has at most one variadic segment
+# dimensions before and after the segments are lined up from either end, and what is
+# left in between must be a lone segment on one side, which is bound to the other side
+def unify_shapes(a, b, σ):
+    l, r = a.shape, b.shape
+    segment = lambda shape: next((i for i, d in enumerate(shape) if type(d) is Dims), None)
+    il, ir = segment(l), segment(r)
+    if il is None and ir is None:
+        if len(l) != len(r):
+            raise UnificationError(a, b, 'unequal lengths')
+        for x, y in zip(l, r):
+            unify(x, y, σ)
+        return σ
+
+    # lengths of the fixed prefix and suffix of each shape
+    before = lambda shape, i: len(shape) if i is None else i
+    after = lambda shape, i: len(shape) if i is None else len(shape) - i - 1
+    p = min(before(l, il), before(r, ir))
+    s = min(after(l, il), after(r, ir))
+    for shape, i, other, j in [(l, il, r, ir), (r, ir, l, il)]:
+        if i is None and len(shape) < before(other, j) + after(other, j):
+            raise UnificationError(a, b, 'unequal lengths')
+
+    for x, y in zip(l[:p], r[:p]):
+        unify(x, y, σ)
+    for x, y in zip(l[len(l) - s:], r[len(r) - s:]):
+        unify(x, y, σ)
+
+    lm, rm = l[p : len(l) - s], r[p : len(r) - s]
+    segment_of = lambda dims: dims[0] if len(dims) == 1 and type(dims[0]) is Dims else Tuple(dims)
+    if len(lm) == 1 and type(lm[0]) is Dims:
+        return bind_dims(lm[0], segment_of(rm), σ)
+    if len(rm) == 1 and type(rm[0]) is Dims:
+        return bind_dims(rm[0], segment_of(lm), σ)
+    raise UnificationError(a, b, 'ambiguous variadic dimensions')
+
+# bind variadic segment d to dims, a Tuple of dimensions or another segment
+def bind_dims(d, dims, σ):
+    if d == dims:
+        return σ
+    if type(dims) is Dims and type(dims.var) is EVar:
+        d, dims = dims, d
+    if type(d.var) is UVar:
+        raise UnificationError(d, dims, 'two rigid type variables'
+            if type(dims) is Dims else 'rigid variadic dimensions')
+    if d in dims.evars():
+        raise UnificationError(d, dims, 'occurs check failed')
+    return σ.union(d, dims)
+
 # -------------------- parsing --------------------
 
 name2var = lambda name: (EVar(name.id[1:]) if name.id[0] == '_' else UVar(name.id))
@@ -705,6 +922,7 @@ to_int = (lambda t:
     AVar(t) if type(t) in (UVar, EVar) else
     t if type(t) in (ALit, AVar) else
     type(t)(to_int(t.a), to_int(t.b)))
+to_dim = lambda t: t if type(t) is Dims else to_int(t)
 to_bool = (lambda t:
     BVar(t) if type(t) in (UVar, EVar) else
     t if type(t) in (BLit, BVar) else
@@ -727,9 +945,12 @@ def from_ast(ast):
         ('a__Name', lambda a: name2var(a)),
 
         ('Fun(_a, _b)', lambda a, b: Fun(go(a), go(b))),
+        # variadic dimensions: array[*batch, n] (python 3.11+) or array[dims(batch), n]
+        ('dims(a__Name)', lambda a: Dims(name2var(a))),
+        ('a__Starred', lambda a: Dims(name2var(a.value))),
         ('array[__a]', lambda a: Array(
-            [to_int(go(i)) for i in a.elts] if type(a) is A.Tuple else
-            [to_int(go(a))])),
+            [to_dim(go(i)) for i in a.elts] if type(a) is A.Tuple else
+            [to_dim(go(a))])),
         ('a__Tuple', lambda a: Tuple([go(i) for i in a.elts])),
 
         ('True', lambda: BLit(True)),
@@ -762,9 +983,12 @@ def parse(s):
         ('bool(a__Name)', lambda a: BVar(name2var(a))),
 
         ('Fun(_a, _b)', lambda a, b: Fun(go(a), go(b))),
+        # variadic dimensions: array[*batch, n] (python 3.11+) or array[dims(batch), n]
+        ('dims(a__Name)', lambda a: Dims(name2var(a))),
+        ('a__Starred', lambda a: Dims(name2var(a.value))),
         ('array[__a]', lambda a: Array(
-            [to_int(go(i)) for i in a.elts] if type(a) is A.Tuple else
-            [to_int(go(a))])),
+            [to_dim(go(i)) for i in a.elts] if type(a) is A.Tuple else
+            [to_dim(go(a))])),
         ('a__Tuple', lambda a: Tuple([go(i) for i in a.elts])),
 
         ('True', lambda: BLit(True)),
@@ -0,0 +1,198 @@
+import multiprocessing
+from multiprocessing.connection import wait
+from contextlib import closing
+import util as U
+import slicing
+
+# verify the components of a constraint (see slicing.py) in worker processes
+#
+#   util.jobs = 4
+#   ... check something ...
+#
+# most components settle in well under a millisecond, far less than it takes to hand
+# them to another process, so each is first tried here with at most quick seconds per
+# query. the queries for the rest (util.queries) go to a worker as smt2 text, the worker
+# makes them in order until one is conclusive, and the answers are taken as they come
+# back. the first component that fails ends the wait: components not started yet are
+# dropped, and the processes of those already running are terminated
+#
+# each component gets the budget's allowance at the time it is sent to a worker, so
+# together the workers may overrun the total by up to jobs - 1 queries
+
+# in a worker process: make the calls (f, args) sent down conn until None arrives or
+# the checker goes away, sending back f(*args), or the exception it raised, for each.
+# the worker closes its copy of the checker's end, parent, so that end closing is seen
+def serve(conn, parent):
+    parent.close()
+    while True:
+        try:
+            call = conn.recv()
+        except EOFError:
+            break
+        if call is None:
+            break
+        f, args = call
+        try:
+            conn.send((True, f(*args)))
+        except BaseException as e:
+            conn.send((False, e))
+
+# worker processes kept for the length of a run (util.workers, set by npcheck.run)
+#
+#   util.workers = Workers()
+#   ... check something ...
+#   util.workers.close()
+#
+# processes are started as calls need them and reused by later calls. closing a results
+# generator before it is done terminates the processes still working on its calls, so a
+# caller that has its answer doesn't leave z3 running in the background
+class Workers:
+    def __init__(self):
+        self.idle = []        # (connection, process) waiting for a call
+        self.processes = set()
+
+    def start(self):
+        conn, child = multiprocessing.Pipe()
+        p = multiprocessing.Process(target=serve, args=(child, conn), daemon=True)
+        p.start()
+        child.close()
+        self.processes.add(p)
+        return conn, p
+
+    def stop(self, conn, p):
+        p.terminate()
+        p.join()
+        conn.close()
+        self.processes.discard(p)
+
+    # make calls [(f, args)] in at most n processes at a time, yielding (index, result)
+    # in the order they finish. calls is consumed as processes come free, so arguments
+    # computed by a generator see the results taken so far
+    def results(self, calls, n):
+        running = {} # connection -> (index, process)
+        try:
+            for i, (f, args) in enumerate(calls):
+                conn, p = self.idle.pop() if len(self.idle) > 0 else self.start()
+                conn.send((f, args))
+                running[conn] = i, p
+                while len(running) >= n:
+                    yield from self.collect(running)
+            while len(running) > 0:
+                yield from self.collect(running)
+        finally:
+            for conn, (_, p) in running.items():
+                self.stop(conn, p)
+
+    # take the answers of the calls in running that are done
+    def collect(self, running):
+        for conn in wait(list(running)):
+            i, p = running.pop(conn)
+            try:
+                ok, value = conn.recv()
+            except EOFError:
+                self.stop(conn, p)
+                raise RuntimeError('npcheck worker exited with code {}'.format(p.exitcode))
+            self.idle.append((conn, p))
+            if not ok:
+                raise value
+            yield i, value
+
+    def close(self):
+        for conn, p in self.idle:
+            conn.send(None)
+            conn.close()
+        for p in self.processes:
+            p.join(1)
+            if p.is_alive():
+                p.terminate()
+                p.join()
+        self.idle = []
+        self.processes = set()
+
+# results of calls as Workers.results, in at most n processes (default util.jobs), using
+# util.workers or, outside a run, processes started for these calls alone
+def results(calls, n=None):
+    n = U.jobs if n is None else n
+    if U.workers is not None:
+        yield from U.workers.results(calls, n)
+        return
+    workers = Workers()
+    try:
+        yield from workers.results(calls, n)
+    finally:
+        workers.close()
+
+def smt2(F):
+    import z3
+    s = z3.Solver()
+    s.add(F)
+    return s.sexpr()
+
+# seconds a component may take here before it is sent to a worker
+quick = 0.05
+
+# whether the constraint behind queries qs holds, if z3 settles it within quick seconds
+# per query, else None
+def settle(qs, origin):
+    for F, suffix, verdicts in qs:
+        result, _ = U.check(F, '{}{}'.format(origin, suffix), limit=quick)
+        if str(result) in verdicts:
+            return verdicts[str(result)]
+    return None
+
+# in a worker: make queries [(smt2, verdicts)] in order with strategy, giving each at
+# most timeout seconds, until one is conclusive; returns [(result, reason unknown, seconds)]
+# a worker doesn't interleave a portfolio, it uses the portfolio's first strategy
+def work(queries, timeout, strategy):
+    import strategies
+    made = []
+    for text, verdicts in queries:
+        made.append(strategies.attempt(strategy, text, timeout))
+        if made[-1][0] in verdicts:
+            break
+    return made
+
+# account for a query a worker made as util.check would have
+def record(F, result, elapsed, origin):
+    U.stats['z3 queries'] += 1
+    if U.budget is not None:
+        U.budget.spend(elapsed)
+    if U.query_log is not None:
+        U.query_log.record(F, result, elapsed, origin)
+
+# whether every one of parts (from slicing.pending) holds, as slicing.holds
+def holds(parts, origin):
+    if U.budget is not None and U.budget.exhausted():
+        return slicing.holds(parts, origin)
+
+    queued = []
+    for part in parts:
+        key, F, uvars, evars, i, n = part
+        qs = U.queries(F, uvars, evars)
+        settled = settle(qs, slicing.describe(origin, i, n))
+        if settled is False:
+            return False
+        if settled:
+            slicing.remember(key)
+        else:
+            queued.append((part, qs))
+    # each part gets the budget's allowance when a worker comes free for it
+    calls = (
+        (work, ([(smt2(G), verdicts) for G, _, verdicts in qs],
+                None if U.budget is None else U.budget.allowance(), U.strategy))
+        for _, qs in queued)
+
+    with closing(results(calls)) as answered:
+        for j, made in answered:
+            (key, _, _, _, i, n), qs = queued[j]
+            answers = iter(made)
+
+            def replay(G, origin):
+                result, reason, elapsed = next(answers)
+                record(G, result, elapsed, origin)
+                return result, reason
+
+            if not U.decide(qs, replay, slicing.describe(origin, i, n)):
+                return False
+            slicing.remember(key)
+    return True
@@ -1,4 +1,7 @@
+import os
+import sys
 import ast
+import pickle
 
 # -------------------- converting AST to basic types --------------------
 
@@ -127,10 +130,12 @@ def matches(pattern, query):
     for k in pattern._fields:
         v = pattern.__getattribute__(k)
         v1 = query.__getattribute__(k)
-        # capture function definition name or argument name or import alias
+        # capture function definition name or argument name or import alias or module
         if type(pattern) is ast.FunctionDef and k == 'name' and v.startswith('_') or \
            type(pattern) is ast.arg and k == 'arg' and v.startswith('_') or \
            type(pattern) is ast.alias and (k == 'name' or k == 'asname') and \
+               v is not None and v.startswith('_') or \
+           type(pattern) is ast.ImportFrom and k == 'module' and \
                v is not None and v.startswith('_'):
             v = ast.parse(v).body[0].value
 
@@ -144,7 +149,16 @@ def matches(pattern, query):
 # extract from code snippet the part of the ast necessary to make a pattern
 # i.e. remove Module node + the Expr node if the pattern is an expression and not a statement
 # and treat a : t as argument annotation, not as an assignment statement
+# pattern strings are parsed once: the resulting asts are never modified, so rules built
+# from the same string share them
+patterns = {} # pattern string -> pattern
+
 def make_pattern(s):
+    if s not in patterns:
+        patterns[s] = parse_pattern(s)
+    return patterns[s]
+
+def parse_pattern(s):
     tree = ast.parse(s).body[0]
     if type(tree) is ast.Expr:
         return tree.value
@@ -158,6 +172,36 @@ def make_pattern(s):
 def raw_pattern(s):
     return ast.parse(s)
  
+# -------------------- snapshots --------------------
+
+# the patterns of the stock rules, parsed ahead of time by snapshot.py so that building
+# the rules at startup parses nothing; set NPCHECK_SNAPSHOT to load another snapshot, or
+# to the empty string to parse every pattern
+snapshot_path = os.environ.get(
+    'NPCHECK_SNAPSHOT',
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), 'patterns.pickle'))
+
+# asts differ between python versions, so snapshots are only used by the version that
+# wrote them
+def save_snapshot(path):
+    with open(path, 'wb') as f:
+        pickle.dump({'python': tuple(sys.version_info[:2]), 'patterns': patterns}, f)
+
+def load_snapshot(path):
+    try:
+        with open(path, 'rb') as f:
+            snapshot = pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError):
+        return False
+    if snapshot.get('python') != tuple(sys.version_info[:2]):
+        return False
+    for s, pattern in snapshot['patterns'].items():
+        patterns.setdefault(s, pattern)
+    return True
+
+if snapshot_path != '':
+    load_snapshot(snapshot_path)
+
 # pretty-print matches
 def pretty_matches(matches):
     if matches is None:
@@ -0,0 +1,90 @@
+import time
+from collections import Counter
+
+# per-rule counters and timings for Checker.analyze
+#
+#   profiler = RuleProfiler()
+#   Checker(rules, profiler=profiler).check(tree)
+#   print(profiler.report())
+#
+# rules are grouped by name, so e.g. the array_+ rules generated for each numpy import
+# share one entry
+
+class RuleStats:
+    def __init__(self):
+        self.tried = 0       # pattern match attempts
+        self.matched = 0     # successful pattern matches
+        self.invoked = 0     # action invocations
+        self.succeeded = 0   # actions that returned
+        self.errors = Counter() # exception type name -> actions that raised it
+        self.cumulative = 0. # seconds in the action, including nested actions
+        self.self_time = 0.  # seconds in the action, excluding nested actions
+        self.contexts = 0    # contexts returned by successful actions
+
+class RuleProfiler:
+    def __init__(self):
+        self.stats = {} # rule name -> RuleStats
+        self.stack = [] # [rule name, time spent in nested actions] for running actions
+        self.clock = time.perf_counter
+
+    def __getitem__(self, rule):
+        name = rule_name(rule)
+        if name not in self.stats:
+            self.stats[name] = RuleStats()
+        return self.stats[name]
+
+    # record an attempt to match each of rules, of which matched succeeded
+    def tried(self, rules, matched):
+        for rule in rules:
+            self[rule].tried += 1
+        for rule in matched:
+            self[rule].matched += 1
+
+    # run rule's action for checker on context Γ with captures match, timing it
+    def call(self, rule, checker, Γ, match):
+        stats = self[rule]
+        name = rule_name(rule)
+        # only the outermost activation of a recursive rule counts towards its total
+        outermost = all(n != name for n, _ in self.stack)
+        stats.invoked += 1
+        frame = [name, 0.]
+        self.stack.append(frame)
+        start = self.clock()
+        try:
+            results = rule.action(checker, Γ, **match)
+            stats.succeeded += 1
+            stats.contexts += len(results)
+            return results
+        except Exception as e:
+            stats.errors[type(e).__name__] += 1
+            raise
+        finally:
+            elapsed = self.clock() - start
+            self.stack.pop()
+            if outermost:
+                stats.cumulative += elapsed
+            stats.self_time += elapsed - frame[1]
+            if len(self.stack) > 0:
+                self.stack[-1][1] += elapsed
+
+    def report(self, sort='self_time', limit=None):
+        rows = sorted(self.stats.items(), key=lambda a: -getattr(a[1], sort))
+        if limit is not None:
+            rows = rows[:limit]
+        width = max([len('rule')] + [len(name) for name, _ in rows])
+        header = '{:<{w}} {:>7} {:>7} {:>7} {:>7} {:>8} {:>10} {:>10}  {}'.format(
+            'rule', 'tried', 'matched', 'invoked', 'ok', 'contexts', 'cum (s)', 'self (s)', 'errors',
+            w=width)
+        lines = [header]
+        for name, s in rows:
+            lines.append('{:<{w}} {:>7} {:>7} {:>7} {:>7} {:>8} {:>10.4f} {:>10.4f}  {}'.format(
+                name, s.tried, s.matched, s.invoked, s.succeeded, s.contexts,
+                s.cumulative, s.self_time,
+                ', '.join('{} {}'.format(n, e) for e, n in s.errors.most_common()),
+                w=width))
+        return '\n'.join(lines)
+
+def rule_name(rule):
+    if rule.name is not None:
+        return rule.name
+    return ' '.join((rule.s if rule.s is not None else str(rule)).split())
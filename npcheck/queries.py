@@ -0,0 +1,87 @@
+import os
+
+# log of the solver calls made by util.verify
+#
+#   util.query_log = QueryLog(slow=1.0, dump_dir='queries')
+#   ... check something ...
+#   print(util.query_log.report())
+#
+# queries slower than slow seconds are written to dump_dir as .smt2 files
+
+class Query:
+    def __init__(self, origin, size, uvars, evars, result, time):
+        self.origin = origin # what asked for the check, e.g. 'def f' or 'Assign at 3:1'
+        self.size = size     # number of distinct subterms of the quantified formula
+        self.uvars = uvars   # universally quantified variables
+        self.evars = evars   # existentially quantified variables
+        self.result = result # 'sat', 'unsat' or 'unknown'
+        self.time = time     # seconds spent in the solver
+        self.dump = None     # path of the .smt2 dump, if any
+
+class QueryLog:
+    def __init__(self, slow=None, dump_dir=None):
+        self.slow = slow
+        self.dump_dir = dump_dir
+        self.queries = []
+
+    def record(self, F, result, elapsed, origin):
+        uvars, evars = quantified(F)
+        q = Query(origin, size(F), uvars, evars, str(result), elapsed)
+        self.queries.append(q)
+        if self.dump_dir is not None and (self.slow is None or elapsed >= self.slow):
+            q.dump = self.write(F, q, len(self.queries))
+        return q
+
+    def write(self, F, q, n):
+        import z3
+        solver = z3.Solver()
+        solver.add(F)
+        os.makedirs(self.dump_dir, exist_ok=True)
+        path = os.path.join(self.dump_dir, 'query{}.smt2'.format(n))
+        with open(path, 'w') as f:
+            f.write('; origin: {}\n; result: {}\n; time: {:.6f}s\n'.format(
+                q.origin, q.result, q.time))
+            f.write(solver.to_smt2())
+        return path
+
+    def solver_time(self):
+        return sum(q.time for q in self.queries)
+
+    # summary, then the queries slowest first
+    def report(self, limit=20, total=None):
+        lines = ['{} z3 queries, {:.4f}s in the solver{}'.format(
+            len(self.queries),
+            self.solver_time(),
+            '' if total is None else ', {:.4f}s elsewhere'.format(total - self.solver_time()))]
+        if len(self.queries) > 0:
+            lines.append('{:>10} {:>8} {:>6} {:>3} {:>3}  {}'.format(
+                'time (s)', 'result', 'size', '∀', '∃', 'origin'))
+        for q in sorted(self.queries, key=lambda q: -q.time)[:limit]:
+            lines.append('{:>10.4f} {:>8} {:>6} {:>3} {:>3}  {}{}'.format(
+                q.time, q.result, q.size, q.uvars, q.evars, q.origin,
+                '' if q.dump is None else ' -> ' + q.dump))
+        return '\n'.join(lines)
+
+# number of distinct subterms of a z3 expression
+def size(F):
+    seen = set()
+    todo = [F]
+    while len(todo) > 0:
+        e = todo.pop()
+        if e.get_id() in seen:
+            continue
+        seen.add(e.get_id())
+        todo.extend(e.children())
+    return len(seen)
+
+# numbers of universally and existentially bound variables in the quantifier prefix of F
+def quantified(F):
+    import z3
+    uvars = evars = 0
+    while z3.is_quantifier(F):
+        if F.is_forall():
+            uvars += F.num_vars()
+        else:
+            evars += F.num_vars()
+        F = F.body()
+    return uvars, evars
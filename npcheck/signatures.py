@@ -0,0 +1,75 @@
+# shape signatures of numpy functions, in the notation of nptype.parse
+#
+# table maps the attribute name a call goes through (the dot of np.dot(a, b) or a.dot(b),
+# the T of a.T) to entries that are each either
+#   (pattern, {capture: argument type}, result type)
+#   (pattern, action name)   for shapes that take more than unification (see numpy_rules)
+# patterns write the alias numpy was imported under as {np}
+#
+# entries are only compiled into rules the first time a checked file uses their name, so
+# adding entries costs nothing until they are used
+
+elementwise = ['abs', 'exp', 'log', 'sqrt', 'sin', 'cos', 'tanh', 'sign', 'floor', 'ceil', 'negative']
+broadcasting = ['add', 'subtract', 'multiply', 'divide', 'power', 'maximum', 'minimum']
+likes = ['zeros_like', 'ones_like', 'empty_like']
+reductions = ['sum', 'mean', 'prod', 'max', 'min', 'argmax', 'argmin']
+
+# reducing along the first and the last axis
+reduce_first = {'a': 'array[n, dims(rest)]'}, 'array[dims(rest)]'
+reduce_last = {'a': 'array[dims(rest), n]'}, 'array[dims(rest)]'
+
+table = {
+    'dot': [
+        ('{np}.dot(_a, _b)', {'a': 'array[n, k]', 'b': 'array[k, m]'}, 'array[n, m]'),
+        ('{np}.dot(_a, _b)', {'a': 'array[n, k]', 'b': 'array[k]'}, 'array[n]'),
+        ('_a.dot(_b)', {'a': 'array[n, k]', 'b': 'array[k, m]'}, 'array[n, m]'),
+        ('_a.dot(_b)', {'a': 'array[n, k]', 'b': 'array[k]'}, 'array[n]')],
+    'matmul': [
+        ('{np}.matmul(_a, _b)',
+            {'a': 'array[dims(batch), n, k]', 'b': 'array[dims(batch), k, m]'},
+            'array[dims(batch), n, m]'),
+        ('{np}.matmul(_a, _b)',
+            {'a': 'array[dims(batch), n, k]', 'b': 'array[k]'},
+            'array[dims(batch), n]'),
+        ('{np}.matmul(_a, _b)',
+            {'a': 'array[k]', 'b': 'array[dims(batch), k, m]'},
+            'array[dims(batch), m]')],
+    'reshape': [
+        ('{np}.reshape(_a, _shape)', 'reshape'),
+        ('_a.reshape(__shape)', 'reshape')],
+    'concatenate': [
+        ('{np}.concatenate((_a, _b))',
+            {'a': 'array[n, dims(rest)]', 'b': 'array[m, dims(rest)]'},
+            'array[n + m, dims(rest)]'),
+        ('{np}.concatenate((_a, _b), axis=0)',
+            {'a': 'array[n, dims(rest)]', 'b': 'array[m, dims(rest)]'},
+            'array[n + m, dims(rest)]'),
+        ('{np}.concatenate((_a, _b), axis=-1)',
+            {'a': 'array[dims(rest), n]', 'b': 'array[dims(rest), m]'},
+            'array[dims(rest), n + m]')],
+    'stack': [
+        ('{np}.stack((_a, _b))',
+            {'a': 'array[dims(s)]', 'b': 'array[dims(s)]'},
+            'array[2, dims(s)]'),
+        ('{np}.stack((_a, _b, _c))',
+            {'a': 'array[dims(s)]', 'b': 'array[dims(s)]', 'c': 'array[dims(s)]'},
+            'array[3, dims(s)]'),
+        ('{np}.stack((_a, _b), axis=-1)',
+            {'a': 'array[dims(s)]', 'b': 'array[dims(s)]'},
+            'array[dims(s), 2]')],
+    'transpose': [
+        ('{np}.transpose(_a)', {'a': 'array[m, n]'}, 'array[n, m]'),
+        ('_a.transpose()', {'a': 'array[m, n]'}, 'array[n, m]')],
+    'T': [
+        ('_a.T', {'a': 'array[m, n]'}, 'array[n, m]')],
+    **{name: [
+        ('{np}.%s(_a, axis=0)' % name, *reduce_first),
+        ('{np}.%s(_a, axis=-1)' % name, *reduce_last),
+        ('_a.%s(axis=0)' % name, *reduce_first),
+        ('_a.%s(axis=-1)' % name, *reduce_last)]
+        for name in reductions},
+    **{name: [('{np}.%s(_a)' % name, {'a': 'array[dims(s)]'}, 'array[dims(s)]')]
+        for name in elementwise + likes},
+    **{name: [('{np}.%s(_lhs, _rhs)' % name, 'broadcast')]
+        for name in broadcasting},
+}
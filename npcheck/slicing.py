@@ -0,0 +1,130 @@
+import util as U
+import nptype as T
+import context as C
+
+# split the constraints of a Context or State into independent components before verify
+#
+# every assumption and goal (substitution equality or requirement) is an atom; atoms that
+# share a variable, directly or through other atoms, land in the same component. for each
+# context the component gets the implication from that context's assumptions in the
+# component to its goals in the component
+#
+# assumptions of a context that share no component with its goals, e.g. the guard of a
+# dead branch or ground facts, go into every component of that context, so a goal that
+# holds only because its guard can't is still proved by its component. their variables
+# then appear in several components, which is sound only for universals, so a context
+# with such an assumption over an existential isn't sliced at all (components is None)
+#
+# if every component holds, so does the whole formula: the components share no existential
+# variables, so their witnesses combine, and dropping assumptions only makes an implication
+# harder to satisfy. the converse fails when an assumption that was dropped matters, so a
+# component that fails is confirmed with the whole formula (see util.verify)
+
+# keys of components that have been verified, during the outermost Checker.check
+verified = set()
+max_verified = 1 << 16
+
+# assumptions and goals of context c, as (z3 formula, variables) pairs
+def atoms(c):
+    σ = c.σ
+    equal = lambda l, r: (l.to_z3() == r.to_z3(), l.vars() | r.vars())
+    assumes = [(p.to_z3(), p.vars()) for p in c.assumes.terms]
+    goals = [(p.to_z3(), p.vars()) for p in c.requires.terms]
+    # as in Substitution.to_z3
+    for a in σ.free_vars():
+        b = σ.find(a)
+        if a != b:
+            goals.append(equal(a, b))
+    for left, right in σ.equalities:
+        l, r = left.under(σ), right.under(σ)
+        if l != r:
+            goals.append(equal(l, r))
+    return assumes, goals
+
+# (z3 formula, uvars, evars) for the independent components of a's constraints, or None
+# if they can't be split
+def components(a):
+    import z3
+    contexts = list(a) if type(a) is C.State else [a]
+    parent = {}
+
+    def find(v):
+        while parent.setdefault(v, v) != v:
+            parent[v] = parent[parent[v]]
+            v = parent[v]
+        return v
+
+    def join(vs):
+        vs = list(vs)
+        for v in vs[1:]:
+            parent[find(v)] = find(vs[0])
+
+    contexts = [atoms(c) for c in contexts]
+    for assumes, goals in contexts:
+        for _, vs in assumes + goals:
+            join(vs)
+
+    uvars = a.uvars() & a.free_vars()
+    evars = a.evars() & a.free_vars()
+
+    # component key -> context index -> ([assumption], [goal])
+    groups = {}
+    # context index -> ([assumption], variables) sharing no component with its goals
+    loose = {}
+    for i, (assumes, goals) in enumerate(contexts):
+        for n, (p, vs) in enumerate(goals):
+            # goals without variables are components of their own
+            key = find(next(iter(vs))) if len(vs) > 0 else ('ground', i, n)
+            groups.setdefault(key, {}).setdefault(i, ([], []))[1].append(p)
+        for p, vs in assumes:
+            key = find(next(iter(vs))) if len(vs) > 0 else None
+            if key in groups and i in groups[key]:
+                groups[key][i][0].append(p)
+            else:
+                ps, ws = loose.setdefault(i, ([], set()))
+                ps.append(p)
+                ws |= vs
+    if any(len(ws & evars) > 0 for _, ws in loose.values()):
+        return None
+
+    members = {}
+    for v in parent:
+        members.setdefault(find(v), set()).add(v)
+
+    formulas = []
+    for key, group in groups.items():
+        F = z3.And([
+            z3.Implies(z3.And(assumes + loose.get(i, ([], set()))[0]), z3.And(goals))
+            for i, (assumes, goals) in group.items()])
+        vs = members.get(key, set()).union(*[loose.get(i, ([], set()))[1] for i in group])
+        formulas.append((F, vs & uvars, vs & evars))
+    return formulas
+
+# components of a's constraints not verified before, as
+# (key, z3 formula, uvars, evars, index, count), or None if they can't be split
+def pending(a):
+    parts = components(a)
+    if parts is None:
+        return None
+    return [
+        (key, F, uvars, evars, i, len(parts))
+        for i, (F, uvars, evars) in enumerate(parts)
+        for key in [(F.sexpr(), frozenset(uvars), frozenset(evars))]
+        if key not in verified]
+
+def remember(key):
+    if len(verified) >= max_verified:
+        verified.clear()
+    verified.add(key)
+
+def describe(origin, i, n):
+    return '{} [slice {}/{}]'.format(origin, i + 1, n)
+
+# whether every one of parts (from pending) holds, checking them one at a time
+# False means some component failed, not that the whole constraint doesn't hold
+def holds(parts, origin):
+    for key, F, uvars, evars, i, n in parts:
+        if not U.holds(F, uvars, evars, describe(origin, i, n)):
+            return False
+        remember(key)
+    return True
@@ -0,0 +1,32 @@
+import os
+import sys
+import glob
+import argparse
+
+# rebuild pattern.snapshot_path: parse the patterns of the stock rules, of the numpy rules
+# for the usual aliases, and of every rule used while checking the example programs
+
+# start from nothing, not from the snapshot being replaced
+os.environ['NPCHECK_SNAPSHOT'] = ''
+
+import pattern as P
+import npcheck as N
+
+here = os.path.dirname(os.path.abspath(__file__))
+examples = os.path.join(here, '..', 'tests', '*.py')
+aliases = ['np', 'numpy']
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Write the pattern snapshot for the stock rules.')
+    parser.add_argument('--output', default=os.path.join(here, 'patterns.pickle'),
+        help='snapshot file (default: %(default)s)')
+    args = parser.parse_args()
+
+    for alias in aliases:
+        N.numpy_rules(alias)
+    for path in sorted(glob.glob(examples)):
+        N.run(N.parse_args([path]))
+
+    P.save_snapshot(args.output)
+    print('{} patterns for python {}.{} written to {}'.format(
+        len(P.patterns), *sys.version_info[:2], args.output))
@@ -0,0 +1,84 @@
+import os
+import sys
+import glob
+import shutil
+import tempfile
+import argparse
+
+import z3
+import npcheck as N
+import strategies
+
+# compare solver strategies (strategies.py) on z3 queries captured from the checker
+#
+#   python solverbench.py               # time every strategy on bench/queries
+#   python solverbench.py --capture     # rebuild bench/queries from tests/*.py
+#
+# the corpus has the queries made checking each example, with and without elimination
+# (so both the quantifier-free and the quantified forms), as written by --dump-queries
+
+here = os.path.dirname(os.path.abspath(__file__))
+default_corpus = os.path.join(here, '..', 'bench', 'queries')
+
+def capture(corpus):
+    shutil.rmtree(corpus, ignore_errors=True)
+    os.makedirs(corpus)
+    for path in sorted(glob.glob(os.path.join(here, '..', 'tests', '*.py'))):
+        name = os.path.splitext(os.path.basename(path))[0]
+        for mode, flags in [('qf', []), ('quantified', ['--no-elimination'])]:
+            with tempfile.TemporaryDirectory() as dump:
+                N.run(N.parse_args([path, '--dump-queries', dump, '--slow-query', '0'] + flags))
+                for n, query in enumerate(sorted(os.listdir(dump), key=lambda q: (len(q), q))):
+                    shutil.copy(os.path.join(dump, query),
+                        os.path.join(corpus, '{}-{}-{}.smt2'.format(name, mode, n + 1)))
+
+# the result recorded when the query was captured
+def expected(text):
+    for line in text.split('\n'):
+        if line.startswith('; result: '):
+            return line[len('; result: '):]
+    return None
+
+# result of strategy name on smt2 text and its best time over repeat runs
+def measure(name, text, timeout, repeat):
+    best = None
+    for _ in range(repeat):
+        if name == 'portfolio':
+            result, _, elapsed = strategies.interleave(z3.And(z3.parse_smt2_string(text)), timeout)
+        else:
+            result, _, elapsed = strategies.attempt(name, text, timeout)
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Compare z3 strategies on captured queries.')
+    parser.add_argument('names', nargs='*', default=[*strategies.solvers, 'portfolio'],
+        help='strategies to compare (default: all)')
+    parser.add_argument('--corpus', default=default_corpus, help='directory of .smt2 queries')
+    parser.add_argument('--capture', action='store_true', help='rebuild the corpus first')
+    parser.add_argument('--timeout', type=float, default=10., help='seconds per query')
+    parser.add_argument('--repeat', type=int, default=3, help='timing runs per query')
+    parser.add_argument('--verbose', '-v', action='store_true', help='show every query')
+    args = parser.parse_args()
+
+    if args.capture:
+        capture(args.corpus)
+
+    paths = sorted(glob.glob(os.path.join(args.corpus, '*.smt2')))
+    totals = {name: [0., 0, 0] for name in args.names} # seconds, unknown, disagreeing
+    for path in paths:
+        text = open(path).read()
+        for name in args.names:
+            result, elapsed = measure(name, text, args.timeout, args.repeat)
+            totals[name][0] += elapsed
+            totals[name][1] += result == 'unknown'
+            totals[name][2] += result != 'unknown' and result != expected(text)
+            if args.verbose:
+                print('{:<32} {:<10} {:>8} {:>10.6f}'.format(
+                    os.path.basename(path), name, result, elapsed))
+
+    print('{} queries'.format(len(paths)))
+    print('{:<10} {:>10} {:>8} {:>10}'.format('strategy', 'time (s)', 'unknown', 'disagree'))
+    for name, (elapsed, unknown, disagree) in totals.items():
+        print('{:<10} {:>10.4f} {:>8} {:>10}'.format(name, elapsed, unknown, disagree))
+    sys.exit(1 if any(d > 0 for _, _, d in totals.values()) else 0)
@@ -0,0 +1,65 @@
+import time
+import z3
+
+# ways of making the z3 solvers util.check and parallel.work ask
+#
+#   util.strategy = 'tactics'    # one of solvers, or 'portfolio'
+#
+# 'tactics' is the default: npcheck's constraints are mostly equations between shape
+# terms under a quantifier prefix, so it simplifies, solves the equations it can and
+# eliminates the quantifiers that are easy to eliminate before handing the rest to smt.
+# 'portfolio' takes turns between the strategies in portfolio (see interleave), for
+# queries one strategy gets stuck on. solverbench.py compares strategies on bench/queries
+
+solvers = {
+    'default': z3.Solver,
+    'tactics': lambda: z3.Then('simplify', 'solve-eqs', 'qe-light', 'smt').solver(),
+    'qe': lambda: z3.Then('simplify', 'qe', 'smt').solver(),
+}
+
+portfolio = ['tactics', 'default', 'qe']
+
+# solver for strategy name, with timeout seconds (None for no limit)
+def solver(name, timeout=None):
+    s = solvers[name if name != 'portfolio' else portfolio[0]]()
+    if timeout is not None:
+        s.set('timeout', max(1, int(timeout * 1000)))
+    return s
+
+# in a worker: the result of smt2 text under strategy name, why it is unknown if it is,
+# and the seconds it took
+def attempt(name, text, timeout):
+    s = solver(name, timeout)
+    s.from_string(text)
+    start = time.perf_counter()
+    result = s.check()
+    return (
+        str(result),
+        s.reason_unknown() if result == z3.unknown else None,
+        time.perf_counter() - start)
+
+# seconds each strategy gets in the first round of interleave; each round doubles it
+first_slice = 0.05
+
+# the first conclusive answer of the strategies in portfolio to closed formula F, as
+# attempt's but with the seconds spent on all of them, or the last unknown once timeout
+# seconds (None for no limit) are used up. the strategies take turns in this process,
+# each with a slice that doubles every round, so a query the first strategy settles in
+# its first slice costs what it would alone, and one it gets stuck on costs at most
+# about ten times what the strategy that settles it needs
+def interleave(F, timeout):
+    start = time.perf_counter()
+    share = first_slice
+    result, reason = 'unknown', 'timeout'
+    while True:
+        for name in portfolio:
+            left = None if timeout is None else timeout - (time.perf_counter() - start)
+            if left is not None and left <= 0:
+                return result, reason, time.perf_counter() - start
+            s = solver(name, share if left is None else min(share, left))
+            s.add(F)
+            result = str(s.check())
+            reason = s.reason_unknown() if result == 'unknown' else None
+            if result != 'unknown':
+                return result, reason, time.perf_counter() - start
+        share *= 2
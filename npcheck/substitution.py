@@ -5,6 +5,8 @@ import util as U
 # if items are not comparable, assume they are equivalent and add equality constraint
 # chooses smallest representative for each component
 class Substitution:
+    __slots__ = ('m', 'compare', 'equalities', 'bias', 'hash')
+
     def __init__(self, compare):
         self.m = {}
         self.compare = compare
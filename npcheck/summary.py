@@ -0,0 +1,170 @@
+import os
+import ast as A
+import json
+import hashlib
+import nptype as T
+from checker import Rule
+
+# shape signatures of checked modules, so that importers load the generalized types of
+# a module's functions instead of re-analyzing it
+#
+# the summary of dir/m.py lives in dir/__npcheck__/m.json and holds
+#   source: hash of m.py when it was checked
+#   deps: module path -> hash of that module's source, for each checked module m imports
+#   functions: name -> type of each top-level function, as produced by fun_def
+
+summary_dir = '__npcheck__'
+
+# -------------------- types <-> json --------------------
+
+predicates = {'==': T.Eq, '<': T.Lt, '>': T.Gt, '<=': T.Le, '>=': T.Ge}
+
+def dump_type(t):
+    tag = type(t).__name__
+    if type(t) in (T.UVar, T.EVar):
+        return [tag, t.name]
+    if type(t) is T.TNone:
+        return [tag]
+    if type(t) in (T.ALit, T.BLit):
+        return [tag, t.value]
+    if type(t) in (T.AVar, T.BVar, T.Dims):
+        return [tag, dump_type(t.var)]
+    if type(t) is T.Not:
+        return [tag, dump_type(t.a)]
+    if type(t) is T.Predicate:
+        return [tag, t.operator, dump_type(t.a), dump_type(t.b)]
+    if type(t) in (T.Add, T.Mul, T.And, T.Or, T.Fun):
+        return [tag, dump_type(t.a), dump_type(t.b)]
+    if type(t) is T.Tuple:
+        return [tag, [dump_type(a) for a in t.items]]
+    if type(t) is T.Array:
+        return [tag, [dump_type(a) for a in t.shape]]
+    raise ValueError('Unknown type (dump_type): ' + str(t))
+
+def load_type(a):
+    tag, args = a[0], a[1:]
+    if tag == 'Predicate':
+        operator, l, r = args
+        return predicates[operator](load_type(l), load_type(r))
+    if tag in ('Tuple', 'Array'):
+        return getattr(T, tag)([load_type(b) for b in args[0]])
+    if tag in ('UVar', 'EVar', 'ALit', 'BLit'):
+        return getattr(T, tag)(args[0])
+    if tag in ('TNone', 'AVar', 'BVar', 'Dims', 'Not', 'Add', 'Mul', 'And', 'Or', 'Fun'):
+        return getattr(T, tag)(*map(load_type, args))
+    raise ValueError('Unknown type tag (load_type): ' + str(tag))
+
+# -------------------- summary files --------------------
+
+def digest(s):
+    return hashlib.sha1(s.encode()).hexdigest()
+
+def summary_path(path):
+    directory, name = os.path.split(os.path.abspath(path))
+    return os.path.join(directory, summary_dir, os.path.splitext(name)[0] + '.json')
+
+# source file for module m, searching the directories in search_path
+def find_module(m, search_path):
+    for directory in search_path:
+        path = os.path.join(directory, *m.split('.')) + '.py'
+        if os.path.isfile(path):
+            return os.path.abspath(path)
+    return None
+
+# paths of the modules imported by tree that can be found on search_path
+def dependencies(tree, search_path):
+    modules = (
+        [alias.name for a in tree.body if type(a) is A.Import for alias in a.names] +
+        [a.module for a in tree.body if type(a) is A.ImportFrom and a.level == 0])
+    return {path
+        for m in modules
+        for path in [find_module(m, search_path)]
+        if path is not None}
+
+# types of the top-level functions defined in tree, taken from the first context of
+# the state the checker produced for it
+def function_types(state, tree):
+    names = [a.name for a in tree.body if type(a) is A.FunctionDef]
+    contexts = list(state)
+    return {name: contexts[0].typeof(name)
+        for name in names
+        if len(contexts) > 0 and all(name in c for c in contexts)}
+
+def write(path, s, tree, types):
+    summary = {
+        'source': digest(s),
+        'deps': {
+            dep: dep_summary['source']
+            for dep in dependencies(tree, [os.path.dirname(os.path.abspath(path))])
+            for dep_summary in [read_summary(dep)]
+            if dep_summary is not None},
+        'functions': {name: dump_type(t) for name, t in types.items()}}
+    target = summary_path(path)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with open(target, 'w') as f:
+        json.dump(summary, f)
+    loaded[target] = (os.stat(target).st_mtime_ns, summary)
+
+# summary path -> (mtime of the summary, parsed summary)
+loaded = {}
+
+def read_summary(path):
+    target = summary_path(path)
+    try:
+        mtime = os.stat(target).st_mtime_ns
+    except OSError:
+        return None
+    if target not in loaded or loaded[target][0] != mtime:
+        with open(target) as f:
+            loaded[target] = (mtime, json.load(f))
+    return loaded[target][1]
+
+# whether the summary for the module at path matches its source and its dependencies
+def up_to_date(path):
+    summary = read_summary(path)
+    if summary is None:
+        return False
+    try:
+        s = open(path).read()
+    except OSError:
+        return False
+    return summary['source'] == digest(s) and all(
+        up_to_date(dep) and read_summary(dep)['source'] == h
+        for dep, h in summary['deps'].items())
+
+# -------------------- import rules --------------------
+
+# modules currently being summarized, to catch import cycles
+summarizing = set()
+
+# function types exported by module m, regenerating its summary with summarize if needed
+# summarize : path -> str * AST * {name: Type} checks the module at path
+def exports(m, search_path, summarize):
+    path = find_module(m, search_path)
+    if path is None:
+        raise ValueError('No checked module named ' + m)
+    if not up_to_date(path):
+        if path in summarizing:
+            raise ValueError('Cyclic import of ' + m)
+        summarizing.add(path)
+        try:
+            s, tree, types = summarize(path)
+        finally:
+            summarizing.remove(path)
+        write(path, s, tree, types)
+    return {name: load_type(t) for name, t in read_summary(path)['functions'].items()}
+
+# rules for importing the modules found on search_path through their summaries
+# modules in skip have rules of their own
+def import_rules(search_path, summarize, skip=('numpy', 'nptyping')):
+    def bind(Γ, m, prefix):
+        if m in skip:
+            raise ValueError('Not a checked module: ' + m)
+        for name, t in exports(m, search_path, summarize).items():
+            # rename apart from the names used by this check
+            Γ.annotate(prefix + name, t.fresh())
+        return [(Γ, None)]
+
+    return [
+        Rule('import _m', lambda self, Γ, m: bind(Γ, m, m + '.'), 'import_module'),
+        Rule('from _m import *', lambda self, Γ, m: bind(Γ, m, ''), 'import_module_all')]
@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import threading
+from functools import wraps
+from contextlib import contextmanager
+from collections import Counter
+import util as U
+from profiler import rule_name
+
+# timeline of a check, for chrome://tracing / perfetto or flamegraph.pl
+#
+#   tracer = Tracer().install()
+#   ... check something ...
+#   tracer.uninstall()
+#   tracer.write_chrome('check.json')       # or write_collapsed('check.folded')
+#
+# spans cover rule actions run by Checker.analyze (named by rule and source position),
+# Context.copy, Context.unify and util.verify. the last three are wrapped only between
+# install and uninstall, so they cost nothing when no tracer is set
+
+# (owner, attribute, span name, category) for each function spanned while installed
+def spanned():
+    import context as C
+    return [
+        (C.Context, 'copy', 'Context.copy', 'context'),
+        (C.Context, 'unify', 'unify', 'context'),
+        (U, 'verify', 'verify', 'z3')]
+
+# f, recording each call as a span named name on tracer
+def wrap(tracer, f, name, cat):
+    @wraps(f)
+    def g(*args, **kwargs):
+        with tracer.span(name, cat):
+            return f(*args, **kwargs)
+    return g
+
+class Span:
+    def __init__(self, name, cat, start, parent):
+        self.name = name
+        self.cat = cat
+        self.start = start
+        self.end = None
+        self.parent = parent # enclosing Span, or None
+        self.children = 0.   # seconds spent in nested spans
+
+    # names of the enclosing spans, outermost first
+    def stack(self):
+        names = []
+        s = self
+        while s is not None:
+            names.append(s.name)
+            s = s.parent
+        return names[::-1]
+
+class Tracer:
+    def __init__(self):
+        self.spans = [] # finished spans, in order of completion
+        self.current = None
+        self.clock = time.perf_counter
+        self.origin = self.clock()
+        self.replaced = [] # (owner, attribute, original) while installed
+
+    # make this util.tracer and wrap the spanned functions
+    def install(self):
+        for owner, attribute, name, cat in spanned():
+            f = getattr(owner, attribute)
+            self.replaced.append((owner, attribute, f))
+            setattr(owner, attribute, wrap(self, f, name, cat))
+        U.tracer = self
+        return self
+
+    # undo install
+    def uninstall(self):
+        for owner, attribute, f in reversed(self.replaced):
+            setattr(owner, attribute, f)
+        self.replaced = []
+        if U.tracer is self:
+            U.tracer = None
+
+    @contextmanager
+    def span(self, name, cat):
+        s = Span(name, cat, self.clock(), self.current)
+        self.current = s
+        try:
+            yield s
+        finally:
+            s.end = self.clock()
+            self.current = s.parent
+            if s.parent is not None:
+                s.parent.children += s.end - s.start
+            self.spans.append(s)
+
+    # span for running rule's action on ast
+    def rule(self, rule, ast):
+        row, col = U.coords(ast)
+        return self.span('{} {}:{}'.format(rule_name(rule), row + 1, col + 1), 'analyze')
+
+    # chrome trace-event format: one complete ('X') event per span, times in microseconds
+    def chrome(self):
+        pid, tid = os.getpid(), threading.get_ident()
+        us = lambda t: round((t - self.origin) * 1e6, 3)
+        return {
+            'traceEvents': [{
+                'name': s.name,
+                'cat': s.cat,
+                'ph': 'X',
+                'ts': us(s.start),
+                'dur': round((s.end - s.start) * 1e6, 3),
+                'pid': pid,
+                'tid': tid} for s in self.spans],
+            'displayTimeUnit': 'ms'}
+
+    # collapsed stacks 'outer;...;inner self-time', self time in microseconds
+    def collapsed(self):
+        weights = Counter()
+        for s in self.spans:
+            frames = [name.replace(';', ',') for name in s.stack()]
+            weights[';'.join(frames)] += (s.end - s.start - s.children) * 1e6
+        return ''.join(
+            '{} {}\n'.format(stack, round(w))
+            for stack, w in sorted(weights.items())
+            if round(w) > 0)
+
+    def write_chrome(self, path):
+        with open(path, 'w') as f:
+            json.dump(self.chrome(), f)
+
+    def write_collapsed(self, path):
+        with open(path, 'w') as f:
+            f.write(self.collapsed())
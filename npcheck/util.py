@@ -1,4 +1,6 @@
 from functools import *
+from collections import Counter
+import time
 indent = lambda space, s: '\n'.join(space + l for l in s.split('\n'))
 typedict = lambda d: ', '.join('{} : {}'.format(k, v) for k, v in d.items())
 union = lambda a, b: a | b
@@ -14,13 +16,28 @@ on = lambda f, g: lambda a, b: f(g(a), g(b))
 eq = lambda a, b: a == b
 zipwith = lambda f, a: (f(l, r) for l, r in a)
 
+# type variables are named by the identifier they come from in the source (a str) or by
+# an id from fresh_ids (an int); Checker.check starts the ids over for each checked file
 def make_fresh():
     i = 0
     while True:
-        yield str(i)
+        yield i
         i += 1
 fresh_ids = make_fresh()
 
+# number of Checker.check calls in progress; fresh_ids restarts when the outermost begins
+checks = 0
+
+# sort key for variable names: ids before identifiers
+name_order = lambda a: (type(a) is str, a)
+
+# how variable name a is shown, and what its z3 constant is called
+display_name = lambda a: a if type(a) is str else 'tmp' + str(a)
+z3_name = lambda a: str(a)
+
+# running totals of analyze calls, contexts created and z3 queries (see bench.py)
+stats = Counter()
+
 def coords(ast):
     import ast as A
     row = ast.lineno - 1 if type(ast) is not A.Module else 0
@@ -34,6 +51,11 @@ def code_pointers(row, cols, s):
         s.split('\n')[row],
         ''.join(('^' if i in cols else ' ') for i in range(max(cols) + 1)))
 
+# short description of where ast is, e.g. for logs
+def describe(ast):
+    row, col = coords(ast)
+    return '{} at {}:{}'.format(type(ast).__name__, row + 1, col + 1)
+
 def highlight(ast, s):
     row, col = coords(ast)
     return code_pointers(row, [col], s)
@@ -53,29 +75,134 @@ def take(n, g):
     return map(lambda a: a[0], zip(g, range(n)))
 
 def to_quantified_z3(a):
-    import z3
-    t = [b.to_z3() for b in a.uvars() & a.free_vars()]
-    e = [b.to_z3() for b in a.evars() & a.free_vars()]
     #nats_t = z3.And([v >= 0 for v in t if type(v) is z3.ArithRef])
     #nats_e = z3.And([v >= 0 for v in e if type(v) is z3.ArithRef])
     #ex = z3.Exists(e, z3.Implies(nats_e, a.to_z3())) if len(e) > 0 else a.to_z3()
     #return z3.ForAll(t, z3.Implies(nats_t, ex)) if len(t) > 0 else ex
-    ex = z3.Exists(e, a.to_z3()) if len(e) > 0 else a.to_z3()
+    return quantify(a.to_z3(), a.uvars() & a.free_vars(), a.evars() & a.free_vars())
+
+# ∀ uvars ∃ evars F
+def quantify(F, uvars, evars):
+    import z3
+    t = [b.to_z3() for b in uvars]
+    e = [b.to_z3() for b in evars]
+    ex = z3.Exists(e, F) if len(e) > 0 else F
     return z3.ForAll(t, ex) if len(t) > 0 else ex
 
-def verify(a):
+# tracing.Tracer recording spans, or None; set it with Tracer.install
+tracer = None
+
+# queries.QueryLog recording each call to verify, or None
+query_log = None
+
+# whether to verify the independent components of a constraint separately (see slicing.py)
+slice_queries = True
+
+# whether to try proving constraints without quantifiers first (see elimination.py)
+eliminate_evars = True
+
+# how util.check makes its z3 solvers (see strategies.py)
+strategy = 'tactics'
+
+# number of worker processes verifying the components of a constraint (see parallel.py)
+jobs = 1
+
+# parallel.Workers running jobs, or None to start processes per call
+workers = None
+
+# budget.Budget limiting the time spent in z3, or None for no limit
+budget = None
+
+# z3 answered unknown, ran out of time or wasn't asked because the budget was used up
+class SolverUnknown(ValueError):
+    def __init__(self, F, reason):
+        super().__init__('Undecided constraint ({}): {}'.format(reason, F))
+        self.reason = reason
+
+# z3's verdict on closed formula F, and why it is unknown if it is
+# limit caps the seconds it may take below what the budget allows
+def check(F, origin=None, limit=None):
     import z3
-    F = to_quantified_z3(a)
+    import strategies
+    if budget is not None and budget.exhausted():
+        return z3.unknown, 'solver budget used up'
+    stats['z3 queries'] += 1
+
+    allowance = None if budget is None else budget.allowance()
+    if limit is not None:
+        allowance = limit if allowance is None else min(allowance, limit)
+    if strategy == 'portfolio':
+        result, reason, elapsed = strategies.interleave(F, allowance)
+    else:
+        s = strategies.solver(strategy, allowance)
+        s.add(F)
+        start = time.perf_counter()
+        result = s.check()
+        elapsed = time.perf_counter() - start
+        reason = s.reason_unknown() if result == z3.unknown else None
+    if budget is not None:
+        budget.spend(elapsed)
+    if query_log is not None:
+        query_log.record(F, result, elapsed, origin)
+    return result, reason
+
+# the queries that decide ∀ uvars ∃ evars F, for quantifier-free F, to be made in order
+# until one is conclusive: (formula, origin suffix, {result: whether the constraint holds})
+def queries(F, uvars, evars):
+    import z3
+    qs = []
+    if eliminate_evars:
+        import elimination
+        G = elimination.eliminate(F, [b.to_z3() for b in evars])
+        if G is not None:
+            # G implies the quantified formula, so it's enough that ¬G has no model;
+            # without evars they're equivalent, and a model of ¬G is a counterexample
+            qs.append((z3.Not(G), ' [qf]',
+                {'unsat': True, 'sat': False} if len(evars) == 0 else {'unsat': True}))
+    qs.append((quantify(F, uvars, evars), '', {'sat': True, 'unsat': False}))
+    return qs
+
+# whether the constraint behind queries qs holds, asking check; raises SolverUnknown if
+# none of them is conclusive
+def decide(qs, check, origin=None):
+    for F, suffix, verdicts in qs:
+        result, reason = check(F, '{}{}'.format(origin, suffix))
+        if str(result) in verdicts:
+            return verdicts[str(result)]
+    if budget is not None:
+        budget.undecided.append((origin, reason))
+    raise SolverUnknown(F, reason)
+
+# whether ∀ uvars ∃ evars F holds, for quantifier-free F
+def holds(F, uvars, evars, origin=None):
+    return decide(queries(F, uvars, evars), check, origin)
+
+# origin describes what asked for the check (see queries.py)
+def verify(a, origin=None):
+    import slicing
+    import parallel
+    parts = slicing.pending(a) if slice_queries else None
+    if parts is not None:
+        solve = parallel.holds if jobs > 1 and len(parts) > 1 else slicing.holds
+        try:
+            if solve(parts, origin):
+                return a
+        except SolverUnknown as e:
+            # a component can leave out assumptions, so report the whole constraint
+            raise SolverUnknown(
+                quantify(a.to_z3(), a.uvars() & a.free_vars(), a.evars() & a.free_vars()),
+                e.reason)
+
+    F = a.to_z3()
+    uvars = a.uvars() & a.free_vars()
+    evars = a.evars() & a.free_vars()
 
     #print('F =', str(F))
     #print('a =', str(a))
 
-    s = z3.Solver()
-    s.add(F)
-
-    if s.check() != z3.sat:
+    if not holds(F, uvars, evars, origin):
         raise ValueError(
             'Unsatisfiable constraint: ' +
-            str(F))
+            str(quantify(F, uvars, evars)))
 
     return a
@@ -0,0 +1,23 @@
+from nptyping import *
+import numpy as np
+
+# array[dims(batch), n] is an array with any number of leading dimensions, then n
+# (on python 3.11+ this can also be spelled array[*batch, n])
+def shift(n: int, x: array[dims(batch), n]) -> array[dims(batch), n]:
+    return x + np.ones(n)
+
+a = shift(4, np.zeros(4))                 # OK. a: array[4]
+b = shift(4, np.zeros((2, 3, 4)))         # OK. b: array[2, 3, 4]
+c = shift(6, np.zeros((2, 3, 4, 5, 6)))   # OK. c: array[2, 3, 4, 5, 6]
+d = b + shift(4, b)                       # OK. d: array[2, 3, 4]
+
+def scale(x: array[dims(batch), n], y: array[dims(batch), n]) -> array[dims(batch), n]:
+    return x * y
+
+e = scale(b, b)                           # OK. e: array[2, 3, 4]
+
+# leading dimensions broadcast as usual against fixed ones
+f = scale(b, b) + np.zeros((7, 1, 1, 4))  # OK. f: array[7, 2, 3, 4]
+
+# Can't unify 'array[5, 6]' with 'array[2, 3, 4]' (unequal lengths)
+# g = scale(b, np.zeros((5, 6)))
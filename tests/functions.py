@@ -0,0 +1,30 @@
+from nptyping import *
+import numpy as np
+
+a = np.zeros((3, 4))
+b = np.ones((4, 5))
+c = np.dot(a, b)                          # OK. c: array[3, 5]
+d = a.dot(np.ones(4))                     # OK. d: array[3]
+e = np.matmul(np.zeros((7, 3, 4)), np.ones((7, 4, 5)))  # OK. e: array[7, 3, 5]
+f = a.T                                   # OK. f: array[4, 3]
+g = np.transpose(c)                       # OK. g: array[5, 3]
+h = np.concatenate((a, np.zeros((2, 4)))) # OK. h: array[5, 4]
+i = np.concatenate((a, c), axis=-1)       # OK. i: array[3, 9]
+j = np.stack((a, a))                      # OK. j: array[2, 3, 4]
+k = np.sum(j, axis=0)                     # OK. k: array[3, 4]
+l = j.mean(axis=-1)                       # OK. l: array[2, 3]
+m = np.exp(e) + np.zeros_like(e)          # OK. m: array[7, 3, 5]
+n = np.maximum(a, np.zeros(4))            # OK. n: array[3, 4]
+o = a.reshape(2, 6)                       # OK. o: array[2, 6]
+p = np.reshape(e, (21, 5))                # OK. p: array[21, 5]
+
+def flatten(r: int, s: int, x: array[r, s]) -> array[r * s]:
+    return x.reshape(r * s)
+
+q = flatten(3, 4, a)                      # OK. q: array[12]
+
+# Can't unify '(3 * 4)' with '(2 * 5)' (unequal values)
+# r = a.reshape(2, 5)
+
+# Can't unify '3' with '4' (unequal values)
+# s = np.dot(a, a)
@@ -30,3 +30,5 @@ class ArrayType:
 array = ArrayType()
 def Fun(*args):
     return 0
+def dims(a):
+    return 0
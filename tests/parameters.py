@@ -0,0 +1,8 @@
+from nptyping import *
+import numpy as np
+
+def f(a: int, b: int, c: int, d: int) -> array[a + b]:
+    x = np.zeros(a + b) + np.zeros(b + a)
+    y = np.zeros(c * d + 1) + np.zeros(1 + d * c)
+    z = np.zeros(c + d) + np.zeros(d + c)
+    return x